@@ -29,6 +29,11 @@ class DatabaseConfig:
     ssl_mode: str = "prefer"
     echo: bool = False
 
+    # 会话参数（批量写入调优，每个后端连接建立时生效一次）
+    synchronous_commit: str = "off"
+    work_mem: str = "64MB"
+    jit: bool = False
+
     @property
     def connection_url(self) -> str:
         """生成数据库连接URL"""
@@ -44,8 +49,24 @@ class DatabaseConfig:
             "password": self.password,
             "connect_timeout": self.connection_timeout,
             "sslmode": self.ssl_mode,
+            "client_encoding": "UTF8",
+            # TCP keepalive：由内核探测死连接，替代应用层的频繁 SELECT 1
+            "keepalives": 1,
+            "keepalives_idle": 30,
+            "keepalives_interval": 10,
+            "keepalives_count": 3,
+            "options": self.session_options,
         }
 
+    @property
+    def session_options(self) -> str:
+        """生成libpq启动参数，连接建立时由服务端直接应用，无需额外SET往返"""
+        return (
+            f"-c synchronous_commit={self.synchronous_commit} "
+            f"-c work_mem={self.work_mem} "
+            f"-c jit={'on' if self.jit else 'off'}"
+        )
+
     def to_dict(self) -> dict:
         """转换为字典"""
         return asdict(self)
@@ -29,7 +29,15 @@ class MqttConfig:
     message_buffer_size: int = 1000
     batch_size: int = 50
 
+    # 分片订阅：按设备类型拆分 factory/telemetry/+/... 通配订阅（须列全设备类型）
+    shard_device_types: List[str] = None
+    # 共享订阅（$share/<share_group>/...）：代理须支持，且不投递保留消息
+    shared_subscription: bool = False
+    share_group: str = "chipmonitor"
+
     def __post_init__(self):
+        if self.shard_device_types is None:
+            self.shard_device_types = []
         if self.subscribe_topics is None:
             self.subscribe_topics = [
                 "factory/telemetry/+/+/msgpack",
@@ -63,6 +71,9 @@ def save_config(config: MqttConfig, file_path: str = "mqtt_config.json"):
             "qos": config.qos,
             "message_buffer_size": config.message_buffer_size,
             "batch_size": config.batch_size,
+            "shard_device_types": config.shard_device_types,
+            "shared_subscription": config.shared_subscription,
+            "share_group": config.share_group,
         }
 
         with open(file_path, "w", encoding="utf-8") as f:
@@ -1,7 +1,7 @@
 import logging
 import time
 import threading
-from typing import Dict, List, Optional, Callable, Any, Union
+from typing import Dict, List, Optional, Callable, Any, Tuple, Union
 from enum import Enum
 from dataclasses import dataclass
 from collections import defaultdict
@@ -18,9 +18,9 @@ class DataChannel(Enum):
     DEVICE_EVENTS = "device_events"
 
 
-@dataclass
+@dataclass(slots=True)
 class DataMessage:
-    """数据消息"""
+    """数据消息（slots：属性访问为固定偏移读取，无实例 __dict__）"""
 
     channel: DataChannel
     source: str
@@ -130,7 +130,7 @@ class DataBus(QObject):
                 live_callbacks = self._get_live_callbacks(channel)
 
                 if not live_callbacks:
-                    self.logger.debug(f"频道 {channel.value} 没有订阅者")
+                    self.logger.debug("频道 %s 没有订阅者", channel.value)
                     return True
 
                 # 同步投递所有消息
@@ -144,8 +144,9 @@ class DataBus(QObject):
                 self.message_published.emit(channel.value, source)
                 self.message_delivered.emit(channel.value, len(live_callbacks))
 
+                # 每条消息都会经过此处，使用惰性格式化：未开启 DEBUG 时不拼接字符串
                 self.logger.debug(
-                    f"消息已发布: {channel.value} -> {len(live_callbacks)}个订阅者"
+                    "消息已发布: %s -> %d个订阅者", channel.value, len(live_callbacks)
                 )
                 return True
 
@@ -154,6 +155,62 @@ class DataBus(QObject):
             self._stats["errors"] += 1
             return False
 
+    def publish_many(
+        self,
+        channel: DataChannel,
+        source: str,
+        items: List[Tuple[Any, Optional[str]]],
+    ) -> bool:
+        """批量发布消息 - 整批只加一次锁、只解析一次订阅者、只发一次信号
+
+        items: [(data, device_id), ...]，按列表顺序投递（同一设备的消息保持先后顺序）
+        """
+        if not items:
+            return True
+        try:
+            with self._lock:
+                live_callbacks = self._get_live_callbacks(channel)
+
+                if not live_callbacks:
+                    self.logger.debug("频道 %s 没有订阅者", channel.value)
+                    return True
+
+                # 循环外绑定方法与时间戳：逐条只做局部变量读取，整批共用发布时刻
+                deliver = self._deliver_sync
+                message_cls = DataMessage
+                timestamp = time.time()
+                for data, device_id in items:
+                    deliver(
+                        live_callbacks,
+                        message_cls(channel, source, data, timestamp, device_id),
+                    )
+
+                # 更新统计
+                count = len(items)
+                self._stats["published"] += count
+                self._stats["delivered"] += count * len(live_callbacks)
+
+                # 发送信号（每批一次）
+                self.message_published.emit(channel.value, source)
+                self.message_delivered.emit(channel.value, len(live_callbacks))
+
+                self.logger.debug(
+                    "批量消息已发布: %s x%d -> %d个订阅者",
+                    channel.value,
+                    count,
+                    len(live_callbacks),
+                )
+                return True
+
+        except Exception as e:
+            self.logger.error(f"批量发布消息失败: {channel.value} -> {e}")
+            self._stats["errors"] += 1
+            return False
+
+    def has_subscribers(self, channel: DataChannel) -> bool:
+        """频道是否有订阅者（无锁快速判断；未清理的失效引用按有订阅者计，偏保守）"""
+        return bool(self._subscribers.get(channel))
+
     def _get_live_callbacks(self, channel: DataChannel) -> List[Callable]:
         """获取活跃回调并清理失效引用"""
         live_callbacks = []
@@ -1,24 +1,314 @@
+import csv
+import hashlib
+import io
+import itertools
 import json
 import logging
+import random
 import time
 import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple, Union
+from functools import lru_cache
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Any,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import psycopg2
+from psycopg2.extensions import connection as PgConnection
 from psycopg2.pool import ThreadedConnectionPool
-from psycopg2.extras import RealDictCursor, execute_values
-from PySide6.QtCore import QObject, QTimer, Signal, Slot
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
+from PySide6.QtCore import QObject, QTimer, Signal, Slot, SIGNAL
 
 from config.database_config import database_config, DatabaseConfig, DatabaseStats
+from .data_bus import DataMessage
+from .redis_manager import redis_manager
 from .thread_pool import TaskType, TaskPriority, get_thread_pool
 
 
+class _SelectQuery(NamedTuple):
+    """按查询形状生成的会话级预备语句"""
+
+    name: str  # 预备语句名（由SQL文本哈希得到，同形状在任何连接上同名）
+    prepare: str  # PREPARE 语句（参数为 $1..$n）
+    execute: str  # EXECUTE 语句（参数为 %s，由 psycopg2 绑定）
+
+
+@lru_cache(maxsize=128)
+def _build_select_query(
+    table: str, conditions: Tuple[str, ...], order_desc: bool = True
+) -> _SelectQuery:
+    """按查询形状（表、条件组合、排序）构建预备语句，相同形状只拼接一次"""
+    where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
+    order = "DESC" if order_desc else "ASC"
+    query = (
+        f"SELECT * FROM {table}{where_clause} "
+        f"ORDER BY data_timestamp {order} LIMIT %s"
+    )
+    parts = query.split("%s")
+    param_count = len(parts) - 1
+    body = parts[0] + "".join(
+        f"${index}{part}" for index, part in enumerate(parts[1:], start=1)
+    )
+    name = "select_" + hashlib.blake2s(query.encode(), digest_size=8).hexdigest()
+    return _SelectQuery(
+        name=name,
+        prepare=f"PREPARE {name} AS {body}",
+        execute=f"EXECUTE {name} ({', '.join(['%s'] * param_count)})",
+    )
+
+
+# 遥测读取来源：合并尚未转存的暂存表（最长 30 秒的最新数据）。暂存表的 data_timestamp
+# 在旧库中为空，统一按 timestamp_us 计算；外层条件会下推到 UNION ALL 的各分支
+_TELEMETRY_SOURCE = """(
+    SELECT
+        id, device_id, device_type, channel, recipe, step,
+        lot_number, wafer_id, pressure, temperature,
+        rf_power, endpoint, gas, timestamp_us, data_timestamp, created_at
+    FROM telemetry_data
+    UNION ALL
+    SELECT
+        id, device_id, device_type, channel, recipe, step,
+        lot_number, wafer_id, pressure, temperature,
+        rf_power, endpoint, gas, timestamp_us,
+        to_timestamp(timestamp_us::double precision / 1000000), created_at
+    FROM telemetry_staging
+) AS telemetry"""
+
+# 统计查询：遥测计数包含尚未转存的暂存表数据
+_STATS_PRECISE_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM telemetry_data)
+            + (SELECT COUNT(*) FROM telemetry_staging) AS telemetry_count,
+        (SELECT COUNT(*) FROM alerts) AS alerts_count,
+        (SELECT COUNT(*) FROM device_events) AS events_count,
+        (SELECT COUNT(*) FROM error_logs) AS errors_count,
+        pg_database_size(current_database()) AS size_bytes
+"""
+
+# 估算版本：读取规划器统计，不扫描表（未ANALYZE的表 reltuples 为 -1）；
+# 数据库大小变化缓慢，单独查询、单独缓存
+_STATS_ESTIMATE_QUERY = """
+    SELECT
+        COALESCE(SUM(GREATEST(reltuples, 0)) FILTER (
+            WHERE oid IN ('telemetry_data'::regclass, 'telemetry_staging'::regclass)
+        ), 0)::bigint AS telemetry_count,
+        COALESCE(SUM(GREATEST(reltuples, 0)) FILTER (
+            WHERE oid = 'alerts'::regclass
+        ), 0)::bigint AS alerts_count,
+        COALESCE(SUM(GREATEST(reltuples, 0)) FILTER (
+            WHERE oid = 'device_events'::regclass
+        ), 0)::bigint AS events_count,
+        COALESCE(SUM(GREATEST(reltuples, 0)) FILTER (
+            WHERE oid = 'error_logs'::regclass
+        ), 0)::bigint AS errors_count
+    FROM pg_class
+    WHERE oid IN (
+        'telemetry_data'::regclass, 'telemetry_staging'::regclass,
+        'alerts'::regclass, 'device_events'::regclass, 'error_logs'::regclass
+    )
+"""
+
+
+# 暂存表转存：data_timestamp 为生成列时由数据库计算，不能写入
+_MOVE_STAGING_QUERY = """
+    INSERT INTO telemetry_data (
+        id, device_id, device_type, channel, recipe, step,
+        lot_number, wafer_id, pressure, temperature,
+        rf_power, endpoint, gas, timestamp_us, created_at
+    )
+    SELECT
+        id, device_id, device_type, channel, recipe, step,
+        lot_number, wafer_id, pressure, temperature,
+        rf_power, endpoint, gas, timestamp_us, created_at
+    FROM telemetry_staging
+"""
+
+# 旧库 data_timestamp 为普通列（已去掉 DEFAULT NOW()）：转存时按 timestamp_us 计算写入
+_MOVE_STAGING_LEGACY_QUERY = """
+    INSERT INTO telemetry_data (
+        id, device_id, device_type, channel, recipe, step,
+        lot_number, wafer_id, pressure, temperature,
+        rf_power, endpoint, gas, timestamp_us, data_timestamp, created_at
+    )
+    SELECT
+        id, device_id, device_type, channel, recipe, step,
+        lot_number, wafer_id, pressure, temperature,
+        rf_power, endpoint, gas, timestamp_us,
+        to_timestamp(timestamp_us::double precision / 1000000), created_at
+    FROM telemetry_staging
+"""
+
+# telemetry_data.data_timestamp 是否为生成列
+_TELEMETRY_TS_GENERATED_QUERY = """
+    SELECT attgenerated = 's' FROM pg_attribute
+    WHERE attrelid = 'telemetry_data'::regclass AND attname = 'data_timestamp'
+"""
+
+
+# 健康检查：存活、当前库连接数、是否为只读备库，一条查询返回
+_HEALTH_CHECK_QUERY = """
+    SELECT
+        (SELECT count(*) FROM pg_stat_activity
+            WHERE datname = current_database()) AS connections,
+        pg_is_in_recovery() AS in_recovery
+"""
+
+# 每个会话只解析/规划一次的常用语句（PREPARE 不受事务回滚影响，会话内一直有效）
+_PREPARED_STATEMENTS = f"""
+    PREPARE upsert_device_v1(text, text, text, timestamptz, timestamptz, text) AS
+        INSERT INTO devices (device_id, device_type, vendor, first_seen, last_seen, description)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (device_id) DO UPDATE SET
+            device_type=EXCLUDED.device_type,
+            vendor=EXCLUDED.vendor,
+            last_seen=EXCLUDED.last_seen;
+    PREPARE get_device_v1(text) AS
+        SELECT * FROM devices WHERE device_id = $1;
+    PREPARE stats_estimate_v2 AS {_STATS_ESTIMATE_QUERY};
+    PREPARE stats_precise_v1 AS {_STATS_PRECISE_QUERY};
+    PREPARE database_size_v1 AS
+        SELECT pg_database_size(current_database()) AS size_bytes;
+"""
+
+
+class _PreparedConnection(PgConnection):
+    """连接池使用的连接类型，记录本会话已执行过的 PREPARE"""
+
+    statements_prepared = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 已在本会话 PREPARE 的查询形状（query_* 方法首次用到时按需准备）
+        self.prepared_queries: Set[str] = set()
+
+
+# Redis 统计缓存：按统计实体分别设置 TTL（基准秒数 ± 抖动秒数）
+# 记录数 30秒；数据库大小变化缓慢，5分钟
+_STATS_CACHE_ENTRIES: Dict[str, Tuple[str, int, int]] = {
+    "counts": ("db:stats:counts:v1", 30, 5),
+    "size": ("db:stats:size:v1", 300, 30),
+}
+_STATS_COUNT_FIELDS = (
+    "telemetry_count",
+    "alerts_count",
+    "events_count",
+    "errors_count",
+)
+
+
+# 批量操作统计键
+_BATCH_STATS_KEYS = (
+    "telemetry_batches",
+    "alerts_batches",
+    "events_batches",
+    "errors_batches",
+    "total_records",
+    "failed_batches",
+)
+
+
+@dataclass(frozen=True)
+class _BatchSpec:
+    """批量写入的表规格"""
+
+    stats_key: str  # batch_stats 中的计数键
+    label: str  # 日志中的数据类别
+    row_builder: str  # DatabaseManager 上的行生成方法名
+    query: str
+    use_copy: bool = False  # True: COPY FROM STDIN；False: execute_values
+    synchronous_commit: bool = False  # 是否对本事务恢复同步提交
+
+
+_BATCH_SPECS: Dict[str, _BatchSpec] = {
+    # 遥测先写入 UNLOGGED 暂存表（不写WAL），由定时任务批量转存
+    "telemetry": _BatchSpec(
+        stats_key="telemetry_batches",
+        label="遥测数据",
+        row_builder="_iter_telemetry_rows",
+        query="""
+            COPY telemetry_staging (
+                device_id, device_type, channel, recipe, step,
+                lot_number, wafer_id, pressure, temperature,
+                rf_power, endpoint, gas, timestamp_us
+            ) FROM STDIN WITH (FORMAT csv)
+        """,
+        use_copy=True,
+    ),
+    # 告警需要更强的持久性
+    "alerts": _BatchSpec(
+        stats_key="alerts_batches",
+        label="告警数据",
+        row_builder="_iter_alert_rows",
+        query="""
+            INSERT INTO alerts 
+            (device_id, alert_type, severity, message, alert_data, data_timestamp)
+            VALUES %s
+        """,
+        synchronous_commit=True,
+    ),
+    "events": _BatchSpec(
+        stats_key="events_batches",
+        label="事件数据",
+        row_builder="_iter_event_rows",
+        query="""
+            INSERT INTO device_events 
+            (device_id, event_type, event_data, severity, data_timestamp)
+            VALUES %s
+        """,
+    ),
+    "errors": _BatchSpec(
+        stats_key="errors_batches",
+        label="错误数据",
+        row_builder="_iter_error_rows",
+        query="""
+            INSERT INTO error_logs 
+            (device_id, error_type, error_code, message, error_data, severity, data_timestamp)
+            VALUES %s
+        """,
+    ),
+}
+
+
+class _CsvRowStream:
+    """按需把行迭代器编码为CSV文本的只读流，供 COPY ... FROM STDIN 分块读取"""
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writerow = csv.writer(self._buffer, lineterminator="\n").writerow
+        self.count = 0
+
+    def read(self, size: int = -1) -> str:
+        buffer = self._buffer
+        for row in self._rows:
+            # CSV 中未加引号的空字段即 NULL
+            self._writerow(row)
+            self.count += 1
+            if 0 <= size <= buffer.tell():
+                break
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+
 class DatabaseManager(QObject):
     """数据库管理器"""
 
     # 信号定义
     connection_changed = Signal(bool, str)
+    connection_tested = Signal(bool, str)
     stats_updated = Signal(object)
     batch_completed = Signal(str, dict)
     batch_failed = Signal(str, str)
@@ -32,20 +322,20 @@ class DatabaseManager(QObject):
         self._connection_pool: Optional[ThreadedConnectionPool] = None
         self._connected = False
         self._lock = threading.RLock()
+        # telemetry_data.data_timestamp 是否为生成列（旧库为普通列，建表时检测）
+        self._telemetry_ts_generated = True
 
         # 统计信息缓存
         self._cached_stats = DatabaseStats()
         self._last_stats_update = 0
+        self._last_emitted_stats_key: Optional[tuple] = None
 
-        # 批量操作统计
-        self.batch_stats = {
-            "telemetry_batches": 0,
-            "alerts_batches": 0,
-            "events_batches": 0,
-            "errors_batches": 0,
-            "total_records": 0,
-            "failed_batches": 0,
-        }
+        # 最近一次健康检查结果
+        self.health_info: Dict[str, Any] = {}
+
+        # 批量操作统计：每个写入线程一份计数，读取时汇总，写入路径无锁
+        self._batch_stats_local = threading.local()
+        self._batch_stats_shards: List[Dict[str, int]] = []
 
         # 设置定时器
         self._setup_timers()
@@ -60,7 +350,12 @@ class DatabaseManager(QObject):
         # 连接健康检查定时器
         self.health_timer = QTimer()
         self.health_timer.timeout.connect(self._health_check)
-        self.health_timer.start(60000)  # 1分钟
+        self.health_timer.start(300000)  # 5分钟（死连接由TCP keepalive探测）
+
+        # 遥测暂存表转存定时器
+        self.staging_timer = QTimer()
+        self.staging_timer.timeout.connect(self._move_staging_async)
+        self.staging_timer.start(30000)  # 30秒
 
     def test_connection(
         self, config: Optional[DatabaseConfig] = None
@@ -91,25 +386,58 @@ class DatabaseManager(QObject):
             self.logger.error(error_msg)
             return False, error_msg
 
+    def test_connection_async(self, config: Optional[DatabaseConfig] = None) -> str:
+        """在线程池中测试数据库连接，结果通过 connection_tested 信号返回"""
+        return self.thread_pool.submit(
+            TaskType.DATA_PROCESSING,
+            self._test_connection_worker,
+            config,
+            task_id=f"db_test_{int(time.time() * 1000)}",
+            priority=TaskPriority.HIGH,
+            timeout=30.0,
+        )
+
+    def _test_connection_worker(self, config: Optional[DatabaseConfig]) -> dict:
+        """连接测试工作函数"""
+        success, message = self.test_connection(config)
+        self.connection_tested.emit(success, message)
+        return {"success": success, "message": message}
+
+    def connect_async(self, config: Optional[DatabaseConfig] = None) -> str:
+        """在线程池中连接数据库，结果通过 connection_changed 信号返回"""
+        return self.thread_pool.submit(
+            TaskType.DATA_PROCESSING,
+            self._connect_worker,
+            config,
+            task_id=f"db_connect_{int(time.time() * 1000)}",
+            priority=TaskPriority.HIGH,
+            timeout=60.0,
+        )
+
+    def _connect_worker(self, config: Optional[DatabaseConfig]) -> dict:
+        """连接工作函数（信号由 connect 内部发射，跨线程自动排队到主线程）"""
+        return {"success": self.connect(config)}
+
     def connect(self, config: Optional[DatabaseConfig] = None) -> bool:
         """连接数据库"""
         with self._lock:
             try:
                 connect_config = config or database_config
 
-                # 关闭现有连接
-                self.disconnect()
+                # 关闭现有连接（首次连接时不发出"已断开"通知）
+                if self._connection_pool:
+                    self.disconnect()
 
                 # 创建连接池
                 self._connection_pool = ThreadedConnectionPool(
                     minconn=connect_config.min_connections,
                     maxconn=connect_config.max_connections,
+                    connection_factory=_PreparedConnection,
                     **connect_config.get_connection_params(),
                 )
 
                 # 测试连接并初始化表结构
-                conn = self._connection_pool.getconn()
-                try:
+                with self._connection() as conn:
                     with conn.cursor() as cursor:
                         cursor.execute("SELECT 1;")
                         cursor.fetchone()
@@ -117,9 +445,6 @@ class DatabaseManager(QObject):
                     # 初始化表结构
                     self._init_tables(conn)
 
-                finally:
-                    self._connection_pool.putconn(conn)
-
                 self._connected = True
                 self.connection_changed.emit(True, "数据库连接成功")
                 self.logger.info("✅ 数据库连接成功")
@@ -148,7 +473,7 @@ class DatabaseManager(QObject):
                 self.logger.error(f"断开数据库连接失败: {e}")
 
     def _init_tables(self, conn):
-        """初始化数据库表结构"""
+        """初始化数据库表结构（所有DDL合并为一次执行，只需一次往返）"""
         try:
             with conn.cursor() as cursor:
                 cursor.execute(
@@ -168,90 +493,123 @@ class DatabaseManager(QObject):
                     endpoint DECIMAL(10,4),                 -- 终点检测信号
                     gas JSONB,                              -- 气体流量
                     timestamp_us BIGINT NOT NULL,           -- 原始微秒时间戳
-                    data_timestamp TIMESTAMPTZ NOT NULL DEFAULT NOW(), -- 解析后的时间
+                    data_timestamp TIMESTAMPTZ GENERATED ALWAYS AS (
+                        to_timestamp(timestamp_us::double precision / 1000000)
+                    ) STORED,                               -- 由微秒时间戳生成
                     created_at TIMESTAMPTZ DEFAULT NOW()
                 );
-                CREATE INDEX IF NOT EXISTS idx_telemetry_device_time ON telemetry_data(device_id, timestamp_us DESC);
+                -- 追加写入的时序表：时间列用 BRIN（体积极小、无页分裂），设备列用小 btree
+                DROP INDEX IF EXISTS idx_telemetry_device_time;
+                CREATE INDEX IF NOT EXISTS idx_telemetry_ts_brin
+                ON telemetry_data USING BRIN (timestamp_us) WITH (pages_per_range = 32);
+                CREATE INDEX IF NOT EXISTS idx_telemetry_data_ts_brin
+                ON telemetry_data USING BRIN (data_timestamp) WITH (pages_per_range = 32);
+                CREATE INDEX IF NOT EXISTS idx_telemetry_device ON telemetry_data(device_id);
                 CREATE INDEX IF NOT EXISTS idx_telemetry_lot ON telemetry_data(lot_number);
                 CREATE INDEX IF NOT EXISTS idx_telemetry_wafer ON telemetry_data(wafer_id);
-                """
-                )
 
-                # 🔥 告警数据表
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS alerts (
-                        id BIGSERIAL PRIMARY KEY,
-                        device_id VARCHAR(100),
-                        alert_type VARCHAR(100) NOT NULL,
-                        severity VARCHAR(20) NOT NULL,
-                        message TEXT NOT NULL,
-                        alert_data JSONB,
-                        data_timestamp TIMESTAMPTZ NOT NULL,
-                        created_at TIMESTAMPTZ DEFAULT NOW(),
-                        resolved_at TIMESTAMPTZ
-                    );
-                    CREATE INDEX IF NOT EXISTS idx_alerts_device_time 
-                    ON alerts(device_id, data_timestamp DESC);
-                    CREATE INDEX IF NOT EXISTS idx_alerts_unresolved 
-                    ON alerts(resolved_at) WHERE resolved_at IS NULL;
-                    CREATE INDEX IF NOT EXISTS idx_alerts_severity
-                    ON alerts(severity);
-                """
-                )
+                -- 遥测暂存表：UNLOGGED 跳过WAL，崩溃时仅丢失未转存的数据
+                CREATE UNLOGGED TABLE IF NOT EXISTS telemetry_staging (
+                    LIKE telemetry_data INCLUDING DEFAULTS INCLUDING GENERATED
+                );
 
-                # 🔥 设备事件表
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS device_events (
-                        id BIGSERIAL PRIMARY KEY,
-                        device_id VARCHAR(100) NOT NULL,
-                        event_type VARCHAR(100) NOT NULL,
-                        event_data JSONB,
-                        severity VARCHAR(20) DEFAULT 'info',
-                        data_timestamp TIMESTAMPTZ NOT NULL,
-                        created_at TIMESTAMPTZ DEFAULT NOW()
-                    );
-                    CREATE INDEX IF NOT EXISTS idx_events_device_time 
-                    ON device_events(device_id, data_timestamp DESC);
-                    CREATE INDEX IF NOT EXISTS idx_events_type 
-                    ON device_events(event_type);
-                """
-                )
+                -- 旧库 data_timestamp 为普通列且 DEFAULT NOW()：去掉默认值，
+                -- 避免写入时间冒充设备时间；暂存表不写该列，由转存时按 timestamp_us 计算
+                DO $$
+                BEGIN
+                    IF EXISTS (
+                        SELECT 1 FROM pg_attribute
+                        WHERE attrelid = 'telemetry_data'::regclass
+                          AND attname = 'data_timestamp' AND attgenerated = ''
+                    ) THEN
+                        ALTER TABLE telemetry_data ALTER COLUMN data_timestamp DROP DEFAULT;
+                    END IF;
+                    IF EXISTS (
+                        SELECT 1 FROM pg_attribute
+                        WHERE attrelid = 'telemetry_staging'::regclass
+                          AND attname = 'data_timestamp' AND attgenerated = ''
+                    ) THEN
+                        ALTER TABLE telemetry_staging
+                            ALTER COLUMN data_timestamp DROP DEFAULT,
+                            ALTER COLUMN data_timestamp DROP NOT NULL;
+                    END IF;
+                END $$;
+
+                -- 🔥 告警数据表
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id BIGSERIAL PRIMARY KEY,
+                    device_id VARCHAR(100),
+                    alert_type VARCHAR(100) NOT NULL,
+                    severity VARCHAR(20) NOT NULL,
+                    message TEXT NOT NULL,
+                    alert_data JSONB,
+                    data_timestamp TIMESTAMPTZ NOT NULL,
+                    created_at TIMESTAMPTZ DEFAULT NOW(),
+                    resolved_at TIMESTAMPTZ
+                );
+                CREATE INDEX IF NOT EXISTS idx_alerts_device_time 
+                ON alerts(device_id, data_timestamp DESC);
+                CREATE INDEX IF NOT EXISTS idx_alerts_unresolved 
+                ON alerts(resolved_at) WHERE resolved_at IS NULL;
+                CREATE INDEX IF NOT EXISTS idx_alerts_severity
+                ON alerts(severity);
+                CREATE INDEX IF NOT EXISTS idx_alerts_ts_brin
+                ON alerts USING BRIN (data_timestamp);
+
+                -- 🔥 设备事件表
+                CREATE TABLE IF NOT EXISTS device_events (
+                    id BIGSERIAL PRIMARY KEY,
+                    device_id VARCHAR(100) NOT NULL,
+                    event_type VARCHAR(100) NOT NULL,
+                    event_data JSONB,
+                    severity VARCHAR(20) DEFAULT 'info',
+                    data_timestamp TIMESTAMPTZ NOT NULL,
+                    created_at TIMESTAMPTZ DEFAULT NOW()
+                );
+                CREATE INDEX IF NOT EXISTS idx_events_device_time 
+                ON device_events(device_id, data_timestamp DESC);
+                CREATE INDEX IF NOT EXISTS idx_events_type 
+                ON device_events(event_type);
 
-                # 🔥 错误日志表
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS error_logs (
-                        id BIGSERIAL PRIMARY KEY,
-                        device_id VARCHAR(100),
-                        error_type VARCHAR(100) NOT NULL,
-                        error_code VARCHAR(50),
-                        message TEXT NOT NULL,
-                        error_data JSONB,
-                        severity VARCHAR(20) DEFAULT 'error',
-                        data_timestamp TIMESTAMPTZ NOT NULL,
-                        created_at TIMESTAMPTZ DEFAULT NOW()
-                    );
-                    CREATE INDEX IF NOT EXISTS idx_errors_device_time 
-                    ON error_logs(device_id, data_timestamp DESC);
-                    CREATE INDEX IF NOT EXISTS idx_errors_type
-                    ON error_logs(error_type);
+                -- 🔥 错误日志表
+                CREATE TABLE IF NOT EXISTS error_logs (
+                    id BIGSERIAL PRIMARY KEY,
+                    device_id VARCHAR(100),
+                    error_type VARCHAR(100) NOT NULL,
+                    error_code VARCHAR(50),
+                    message TEXT NOT NULL,
+                    error_data JSONB,
+                    severity VARCHAR(20) DEFAULT 'error',
+                    data_timestamp TIMESTAMPTZ NOT NULL,
+                    created_at TIMESTAMPTZ DEFAULT NOW()
+                );
+                CREATE INDEX IF NOT EXISTS idx_errors_device_time 
+                ON error_logs(device_id, data_timestamp DESC);
+                CREATE INDEX IF NOT EXISTS idx_errors_type
+                ON error_logs(error_type);
+
+                -- 设备信息表
+                CREATE TABLE IF NOT EXISTS devices (
+                    device_id VARCHAR(100) PRIMARY KEY,
+                    device_type VARCHAR(100),
+                    vendor VARCHAR(100),
+                    first_seen TIMESTAMPTZ DEFAULT NOW(),
+                    last_seen TIMESTAMPTZ,
+                    description TEXT
+                ) WITH (fillfactor = 70);
+
+                -- last_seen 每轮刷新都会更新：预留页内空间走 HOT 更新，
+                -- 且 last_seen 不建索引（被索引的列更新无法 HOT），device_id 由主键覆盖
+                ALTER TABLE devices SET (fillfactor = 70);
                 """
                 )
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS devices (
-                        device_id VARCHAR(100) PRIMARY KEY,
-                        device_type VARCHAR(100),
-                        vendor VARCHAR(100),
-                        first_seen TIMESTAMPTZ DEFAULT NOW(),
-                        last_seen TIMESTAMPTZ,
-                        description TEXT
-                    );
-                    """
-                )
+                cursor.execute(_TELEMETRY_TS_GENERATED_QUERY)
+                self._telemetry_ts_generated = bool(cursor.fetchone()[0])
                 conn.commit()
+                if not self._telemetry_ts_generated:
+                    self.logger.info(
+                        "telemetry_data.data_timestamp 为普通列，转存时写入"
+                    )
                 self.logger.info("数据库表结构初始化完成")
 
         except Exception as e:
@@ -260,14 +618,13 @@ class DatabaseManager(QObject):
             raise
 
     # 批量插入方法
-    def batch_insert_telemetry(self, messages: List) -> dict:
-        """批量插入遥测数据"""
-        if not self.is_connected():
-            return {"success": False, "processed": 0, "errors": ["数据库未连接"]}
+    def _iter_telemetry_rows(self, messages: List[DataMessage]) -> Iterator[tuple]:
+        """逐条生成遥测插入行（顺序必须与 telemetry_data 表列一致）"""
+        # 回退时间戳每批只计算一次（整数微秒）
+        batch_now_us = int(time.time() * 1_000_000)
 
-        values = []
         for msg in messages:
-            raw_data = getattr(msg, "data", {})
+            raw_data = msg.data
             if not isinstance(raw_data, dict):
                 self.logger.warning("遥测消息 data 不是 dict")
                 continue
@@ -284,16 +641,14 @@ class DatabaseManager(QObject):
                 self.logger.warning("遥测数据缺少 device_id")
                 continue
 
-            device_type = raw_data.get("device_type", "UNKNOWN")
             channel = record.get("channel")
-            recipe = record.get("recipe")
-            step = record.get("step")
-            lot_number = record.get("lot_number")
-            wafer_id = record.get("wafer_id")
-            pressure = record.get("pressure")
-            temperature = record.get("temperature")
-            rf_power = record.get("rf_power")
-            endpoint = record.get("endpoint")
+            if isinstance(channel, float):
+                # _map_fields 将通道转为 float，COPY 的 INTEGER 列需要整数文本；
+                # NaN/inf/非整数值只跳过该行（channel 列 NOT NULL），不拖累整批 COPY
+                if not channel.is_integer():
+                    self.logger.warning(f"无效通道号: {channel} ({device_id})")
+                    continue
+                channel = int(channel)
 
             # 重建 gas 字典（从展平字段还原）
             gas = {}
@@ -303,249 +658,162 @@ class DatabaseManager(QObject):
                     gas[gas_key] = value
             gas_json = json.dumps(gas) if gas else None
 
-            # 时间戳：优先使用设备原始微秒时间戳
+            # 时间戳：优先使用设备原始微秒时间戳，data_timestamp 由数据库按 timestamp_us 计算
             timestamp_us = record.get("device_timestamp")
             if timestamp_us is not None:
                 try:
                     timestamp_us = int(timestamp_us)
-                    data_timestamp = datetime.fromtimestamp(timestamp_us / 1_000_000)
-                except (ValueError, OSError, OverflowError):
+                except (ValueError, TypeError, OverflowError):
                     self.logger.warning(f"无效设备时间戳: {timestamp_us}")
-                    timestamp_us = None
-                    data_timestamp = datetime.now()
+                    timestamp_us = batch_now_us
             else:
                 # 回退到主机解析时间
                 host_ts = raw_data.get("timestamp")  # 秒
-                data_timestamp = (
-                    datetime.fromtimestamp(host_ts) if host_ts else datetime.now()
+                timestamp_us = int(host_ts * 1_000_000) if host_ts else batch_now_us
+
+            yield (
+                device_id,
+                raw_data.get("device_type", "UNKNOWN"),
+                channel,
+                record.get("recipe"),
+                record.get("step"),
+                record.get("lot_number"),
+                record.get("wafer_id"),
+                record.get("pressure"),
+                record.get("temperature"),
+                record.get("rf_power"),
+                record.get("endpoint"),
+                gas_json,
+                timestamp_us,
+            )
+
+    @staticmethod
+    def _iter_alert_rows(messages: List[DataMessage]) -> Iterator[tuple]:
+        """逐条生成告警插入行"""
+        for msg in messages:
+            data = msg.data
+            data_timestamp = datetime.fromtimestamp(msg.timestamp)
+            if isinstance(data, dict):
+                yield (
+                    msg.device_id or "",
+                    data.get("alert_type", "unknown"),
+                    data.get("severity", "info"),
+                    data["message"] if "message" in data else str(data),
+                    json.dumps(data),
+                    data_timestamp,
                 )
-                timestamp_us = int(data_timestamp.timestamp() * 1_000_000)
-
-            # === 构造插入值（顺序必须与 telemetry_data 表列一致）===
-            values.append(
-                (
-                    device_id,
-                    device_type,
-                    channel,
-                    recipe,
-                    step,
-                    lot_number,
-                    wafer_id,
-                    pressure,
-                    temperature,
-                    rf_power,
-                    endpoint,
-                    gas_json,
-                    timestamp_us,
+            else:
+                yield (
+                    msg.device_id or "",
+                    "unknown",
+                    "info",
+                    str(data),
+                    None,
                     data_timestamp,
                 )
-            )
-
-        if not values:
-            return {"success": True, "processed": 0, "errors": []}
-
-        try:
-            conn = self._connection_pool.getconn()
-            try:
-                with conn.cursor() as cursor:
-                    query = """
-                        INSERT INTO telemetry_data (
-                            device_id, device_type, channel, recipe, step,
-                            lot_number, wafer_id, pressure, temperature,
-                            rf_power, endpoint, gas, timestamp_us, data_timestamp
-                        ) VALUES %s
-                    """
-                    execute_values(cursor, query, values, page_size=1000)
-                conn.commit()
-                result = {"success": True, "processed": len(values), "errors": []}
-                self.batch_stats["telemetry_batches"] += 1
-                self.batch_stats["total_records"] += len(values)
-                self.batch_completed.emit("telemetry", result)
-                return result
-            finally:
-                self._connection_pool.putconn(conn)
-        except Exception as e:
-            error_msg = f"批量插入遥测数据失败: {e}"
-            self.logger.error(error_msg)
-            self.batch_stats["failed_batches"] += 1
-            self.batch_failed.emit("telemetry", error_msg)
-            return {"success": False, "processed": 0, "errors": [error_msg]}
-
-    def batch_insert_alerts(self, messages: List) -> dict:
-        """批量插入告警数据"""
-        if not self.is_connected():
-            return {"success": False, "processed": 0, "errors": ["数据库未连接"]}
 
-        try:
-            values = []
-            for msg in messages:
-                data = msg.data if hasattr(msg, "data") else msg
-                values.append(
-                    (
-                        getattr(msg, "device_id", "") or "",
-                        (
-                            data.get("alert_type", "unknown")
-                            if isinstance(data, dict)
-                            else "unknown"
-                        ),
-                        (
-                            data.get("severity", "info")
-                            if isinstance(data, dict)
-                            else "info"
-                        ),
-                        (
-                            data.get("message", str(data))
-                            if isinstance(data, dict)
-                            else str(data)
-                        ),
-                        json.dumps(data) if isinstance(data, dict) else None,
-                        datetime.fromtimestamp(getattr(msg, "timestamp", time.time())),
-                    )
+    @staticmethod
+    def _iter_event_rows(messages: List[DataMessage]) -> Iterator[tuple]:
+        """逐条生成事件插入行"""
+        for msg in messages:
+            data = msg.data
+            data_timestamp = datetime.fromtimestamp(msg.timestamp)
+            if isinstance(data, dict):
+                yield (
+                    msg.device_id or "",
+                    data.get("event_type", "unknown"),
+                    json.dumps(data),
+                    data.get("severity", "info"),
+                    data_timestamp,
                 )
+            else:
+                yield (msg.device_id or "", "unknown", None, "info", data_timestamp)
 
-            conn = self._connection_pool.getconn()
-            try:
-                with conn.cursor() as cursor:
-                    query = """
-                        INSERT INTO alerts 
-                        (device_id, alert_type, severity, message, alert_data, data_timestamp)
-                        VALUES %s
-                    """
-                    execute_values(cursor, query, values, page_size=1000)
-                conn.commit()
-
-                result = {"success": True, "processed": len(messages), "errors": []}
-                self.batch_stats["alerts_batches"] += 1
-                self.batch_stats["total_records"] += len(messages)
-
-                self.batch_completed.emit("alerts", result)
-                return result
-
-            finally:
-                self._connection_pool.putconn(conn)
-
-        except Exception as e:
-            error_msg = f"批量插入告警数据失败: {e}"
-            self.logger.error(error_msg)
-            self.batch_stats["failed_batches"] += 1
-            self.batch_failed.emit("alerts", error_msg)
-            return {"success": False, "processed": 0, "errors": [error_msg]}
+    @staticmethod
+    def _iter_error_rows(messages: List[DataMessage]) -> Iterator[tuple]:
+        """逐条生成错误日志插入行"""
+        for msg in messages:
+            data = msg.data
+            data_timestamp = datetime.fromtimestamp(msg.timestamp)
+            if isinstance(data, dict):
+                yield (
+                    msg.device_id or "",
+                    data.get("error_type", "unknown"),
+                    data.get("error_code"),
+                    data["message"] if "message" in data else str(data),
+                    json.dumps(data),
+                    data.get("severity", "error"),
+                    data_timestamp,
+                )
+            else:
+                yield (
+                    msg.device_id or "",
+                    "unknown",
+                    None,
+                    str(data),
+                    None,
+                    "error",
+                    data_timestamp,
+                )
 
-    def batch_insert_events(self, messages: List) -> dict:
-        """批量插入事件数据"""
+    def _batch_insert(self, kind: str, messages: List[DataMessage]) -> dict:
+        """按 _BATCH_SPECS 中的表规格批量写入，四类数据共用同一写入路径"""
+        spec = _BATCH_SPECS[kind]
         if not self.is_connected():
             return {"success": False, "processed": 0, "errors": ["数据库未连接"]}
 
         try:
-            values = []
-            for msg in messages:
-                data = msg.data if hasattr(msg, "data") else msg
-                values.append(
-                    (
-                        getattr(msg, "device_id", "") or "",
-                        (
-                            data.get("event_type", "unknown")
-                            if isinstance(data, dict)
-                            else "unknown"
-                        ),
-                        json.dumps(data) if isinstance(data, dict) else None,
-                        (
-                            data.get("severity", "info")
-                            if isinstance(data, dict)
-                            else "info"
-                        ),
-                        datetime.fromtimestamp(getattr(msg, "timestamp", time.time())),
-                    )
-                )
+            rows = getattr(self, spec.row_builder)(messages)
+            first_row = next(rows, None)
+            if first_row is None:
+                return {"success": True, "processed": 0, "errors": []}
+            rows = itertools.chain((first_row,), rows)
 
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor() as cursor:
-                    query = """
-                        INSERT INTO device_events 
-                        (device_id, event_type, event_data, severity, data_timestamp)
-                        VALUES %s
-                    """
-                    execute_values(cursor, query, values, page_size=1000)
+                    if spec.synchronous_commit:
+                        # 仅对本事务恢复同步提交
+                        cursor.execute("SET LOCAL synchronous_commit = on")
+                    if spec.use_copy:
+                        # COPY 流式写入：跳过 INSERT 字面量拼接与服务端逐条解析
+                        stream = _CsvRowStream(rows)
+                        cursor.copy_expert(spec.query, stream)
+                        processed = stream.count
+                    else:
+                        execute_values(cursor, spec.query, rows, page_size=1000)
+                        processed = len(messages)
                 conn.commit()
 
-                result = {"success": True, "processed": len(messages), "errors": []}
-                self.batch_stats["events_batches"] += 1
-                self.batch_stats["total_records"] += len(messages)
+                result = {"success": True, "processed": processed, "errors": []}
+                shard = self._batch_stats_shard()
+                shard[spec.stats_key] += 1
+                shard["total_records"] += processed
 
-                self.batch_completed.emit("events", result)
+                self.batch_completed.emit(kind, result)
                 return result
 
-            finally:
-                self._connection_pool.putconn(conn)
-
         except Exception as e:
-            error_msg = f"批量插入事件数据失败: {e}"
+            error_msg = f"批量插入{spec.label}失败: {e}"
             self.logger.error(error_msg)
-            self.batch_stats["failed_batches"] += 1
-            self.batch_failed.emit("events", error_msg)
+            self._batch_stats_shard()["failed_batches"] += 1
+            self.batch_failed.emit(kind, error_msg)
             return {"success": False, "processed": 0, "errors": [error_msg]}
 
-    def batch_insert_errors(self, messages: List) -> dict:
-        """批量插入错误数据"""
-        if not self.is_connected():
-            return {"success": False, "processed": 0, "errors": ["数据库未连接"]}
-
-        try:
-            values = []
-            for msg in messages:
-                data = msg.data if hasattr(msg, "data") else msg
-                values.append(
-                    (
-                        getattr(msg, "device_id", "") or "",
-                        (
-                            data.get("error_type", "unknown")
-                            if isinstance(data, dict)
-                            else "unknown"
-                        ),
-                        data.get("error_code") if isinstance(data, dict) else None,
-                        (
-                            data.get("message", str(data))
-                            if isinstance(data, dict)
-                            else str(data)
-                        ),
-                        json.dumps(data) if isinstance(data, dict) else None,
-                        (
-                            data.get("severity", "error")
-                            if isinstance(data, dict)
-                            else "error"
-                        ),
-                        datetime.fromtimestamp(getattr(msg, "timestamp", time.time())),
-                    )
-                )
-
-            conn = self._connection_pool.getconn()
-            try:
-                with conn.cursor() as cursor:
-                    query = """
-                        INSERT INTO error_logs 
-                        (device_id, error_type, error_code, message, error_data, severity, data_timestamp)
-                        VALUES %s
-                    """
-                    execute_values(cursor, query, values, page_size=1000)
-                conn.commit()
-
-                result = {"success": True, "processed": len(messages), "errors": []}
-                self.batch_stats["errors_batches"] += 1
-                self.batch_stats["total_records"] += len(messages)
+    def batch_insert_telemetry(self, messages: List[DataMessage]) -> dict:
+        """批量插入遥测数据"""
+        return self._batch_insert("telemetry", messages)
 
-                self.batch_completed.emit("errors", result)
-                return result
+    def batch_insert_alerts(self, messages: List[DataMessage]) -> dict:
+        """批量插入告警数据"""
+        return self._batch_insert("alerts", messages)
 
-            finally:
-                self._connection_pool.putconn(conn)
+    def batch_insert_events(self, messages: List[DataMessage]) -> dict:
+        """批量插入事件数据"""
+        return self._batch_insert("events", messages)
 
-        except Exception as e:
-            error_msg = f"批量插入错误数据失败: {e}"
-            self.logger.error(error_msg)
-            self.batch_stats["failed_batches"] += 1
-            self.batch_failed.emit("errors", error_msg)
-            return {"success": False, "processed": 0, "errors": [error_msg]}
+    def batch_insert_errors(self, messages: List[DataMessage]) -> dict:
+        """批量插入错误数据"""
+        return self._batch_insert("errors", messages)
 
     # 查询方法
     def query_telemetry_data(
@@ -564,8 +832,7 @@ class DatabaseManager(QObject):
             return []
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     # 构建查询条件
                     conditions = []
@@ -605,35 +872,21 @@ class DatabaseManager(QObject):
                         conditions.append("data_timestamp <= %s")
                         params.append(end_time)
 
-                    where_clause = (
-                        " WHERE " + " AND ".join(conditions) if conditions else ""
-                    )
-                    order_clause = (
-                        "ORDER BY data_timestamp DESC"
-                        if order_desc
-                        else "ORDER BY data_timestamp ASC"
+                    query = _build_select_query(
+                        _TELEMETRY_SOURCE, tuple(conditions), order_desc
                     )
-
-                    query = f"""
-                        SELECT * FROM telemetry_data
-                        {where_clause}
-                        {order_clause}
-                        LIMIT %s
-                    """
                     params.append(limit)
 
-                    self.logger.debug(f"执行查询: {query}")
+                    self.logger.debug(f"执行查询: {query.prepare}")
                     self.logger.debug(f"查询参数: {params}")
 
-                    cursor.execute(query, params)
-                    results = [dict(row) for row in cursor.fetchall()]
+                    self._execute_select(conn, cursor, query, params)
+                    # RealDictRow 本身是 dict 子类，无需逐行复制
+                    results = cursor.fetchall()
 
                     self.logger.info(f"查询返回 {len(results)} 条记录")
                     return results
 
-            finally:
-                self._connection_pool.putconn(conn)
-
         except Exception as e:
             self.logger.error(f"查询遥测数据失败: {e}")
             raise  # 重新抛出异常以便上层处理
@@ -650,8 +903,7 @@ class DatabaseManager(QObject):
             return []
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     conditions = []
                     params = []
@@ -667,23 +919,11 @@ class DatabaseManager(QObject):
                     if unresolved_only:
                         conditions.append("resolved_at IS NULL")
 
-                    where_clause = (
-                        " WHERE " + " AND ".join(conditions) if conditions else ""
-                    )
-
-                    query = f"""
-                        SELECT * FROM alerts
-                        {where_clause}
-                        ORDER BY data_timestamp DESC
-                        LIMIT %s
-                    """
+                    query = _build_select_query("alerts", tuple(conditions))
                     params.append(limit)
 
-                    cursor.execute(query, params)
-                    return [dict(row) for row in cursor.fetchall()]
-
-            finally:
-                self._connection_pool.putconn(conn)
+                    self._execute_select(conn, cursor, query, params)
+                    return cursor.fetchall()
 
         except Exception as e:
             self.logger.error(f"查询告警数据失败: {e}")
@@ -702,8 +942,7 @@ class DatabaseManager(QObject):
             return []
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     conditions = []
                     params = []
@@ -724,23 +963,11 @@ class DatabaseManager(QObject):
                         conditions.append("data_timestamp <= %s")
                         params.append(end_time)
 
-                    where_clause = (
-                        " WHERE " + " AND ".join(conditions) if conditions else ""
-                    )
-
-                    query = f"""
-                        SELECT * FROM device_events
-                        {where_clause}
-                        ORDER BY data_timestamp DESC
-                        LIMIT %s
-                    """
+                    query = _build_select_query("device_events", tuple(conditions))
                     params.append(limit)
 
-                    cursor.execute(query, params)
-                    return [dict(row) for row in cursor.fetchall()]
-
-            finally:
-                self._connection_pool.putconn(conn)
+                    self._execute_select(conn, cursor, query, params)
+                    return cursor.fetchall()
 
         except Exception as e:
             self.logger.error(f"查询设备事件失败: {e}")
@@ -752,20 +979,19 @@ class DatabaseManager(QObject):
             return {}
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     end_time = datetime.now()
                     start_time = end_time - timedelta(days=days)
 
                     # 遥测数据统计
                     cursor.execute(
-                        """
+                        f"""
                         SELECT COUNT(*) as telemetry_count,
                                AVG(temperature) as avg_temperature,
                                AVG(pressure) as avg_pressure,
                                AVG(rf_power) as avg_rf_power
-                        FROM telemetry_data 
+                        FROM {_TELEMETRY_SOURCE}
                         WHERE device_id = %s AND data_timestamp BETWEEN %s AND %s
                     """,
                         (device_id, start_time, end_time),
@@ -809,18 +1035,19 @@ class DatabaseManager(QObject):
                         "query_time": datetime.now(),
                     }
 
-            finally:
-                self._connection_pool.putconn(conn)
-
         except Exception as e:
             self.logger.error(f"获取设备统计失败: {e}")
             return {}
 
-    def get_stats(self) -> DatabaseStats:
-        """获取统计信息"""
+    def get_stats(self, precise: bool = False) -> DatabaseStats:
+        """获取统计信息
+
+        默认使用 pg_class.reltuples 估算记录数（O(1)，依赖 autovacuum/ANALYZE 保持新鲜）；
+        precise=True 时执行精确 COUNT(*)，仅用于报表等需要准确值的场景。
+        """
         # 使用缓存
         current_time = time.time()
-        if current_time - self._last_stats_update < 10:
+        if not precise and current_time - self._last_stats_update < 10:
             return self._cached_stats
 
         stats = DatabaseStats()
@@ -831,51 +1058,83 @@ class DatabaseManager(QObject):
             self._cached_stats = stats
             return stats
 
-        try:
-            conn = self._connection_pool.getconn()
-            try:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    # 获取记录数
-                    cursor.execute("SELECT COUNT(*) as count FROM telemetry_data")
-                    stats.telemetry_count = cursor.fetchone()["count"]
-
-                    cursor.execute("SELECT COUNT(*) as count FROM alerts")
-                    stats.alerts_count = cursor.fetchone()["count"]
-
-                    cursor.execute("SELECT COUNT(*) as count FROM device_events")
-                    stats.events_count = cursor.fetchone()["count"]
+        # Redis 共享缓存：多个进程共用一份统计，各实体按自己的 TTL 到期，只查询未命中的部分
+        shared = {} if precise else self._load_shared_stats()
 
-                    cursor.execute("SELECT COUNT(*) as count FROM error_logs")
-                    stats.errors_count = cursor.fetchone()["count"]
-
-                    stats.total_records = (
-                        stats.telemetry_count
-                        + stats.alerts_count
-                        + stats.events_count
-                        + stats.errors_count
-                    )
-
-                    # 获取数据库大小
-                    cursor.execute(
-                        "SELECT pg_database_size(current_database()) as size_bytes"
-                    )
-                    size_bytes = cursor.fetchone()["size_bytes"]
-                    stats.database_size_mb = size_bytes / 1024 / 1024
-
-                    # 添加批量统计
-                    stats.batch_stats = self.batch_stats.copy()
+        try:
+            fetched = {}
+            if len(shared) < len(_STATS_CACHE_ENTRIES):
+                with self._connection() as conn:
+                    self._ensure_prepared(conn)
+                    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                        if precise:
+                            # 精确记录数与数据库大小合并为一条查询，只需一次往返
+                            cursor.execute("EXECUTE stats_precise_v1")
+                            row = cursor.fetchone()
+                            fetched["counts"] = {
+                                field: row[field] for field in _STATS_COUNT_FIELDS
+                            }
+                            fetched["size"] = row["size_bytes"]
+                        else:
+                            if "counts" not in shared:
+                                cursor.execute("EXECUTE stats_estimate_v2")
+                                fetched["counts"] = dict(cursor.fetchone())
+                            if "size" not in shared:
+                                cursor.execute("EXECUTE database_size_v1")
+                                fetched["size"] = cursor.fetchone()["size_bytes"]
+
+            counts = fetched.get("counts") or shared["counts"]
+            for field in _STATS_COUNT_FIELDS:
+                setattr(stats, field, counts[field])
+            stats.total_records = sum(counts[field] for field in _STATS_COUNT_FIELDS)
+            stats.database_size_mb = (
+                fetched.get("size", shared.get("size")) / 1024 / 1024
+            )
 
-            finally:
-                self._connection_pool.putconn(conn)
+            # 添加批量统计（按进程统计，不进入共享缓存）
+            stats.batch_stats = self.batch_stats
 
-            self._cached_stats = stats
-            self._last_stats_update = current_time
+            if not precise:
+                self._cached_stats = stats
+                self._last_stats_update = current_time
+                self._store_shared_stats(fetched)
 
         except Exception as e:
             self.logger.error(f"获取统计信息失败: {e}")
 
         return stats
 
+    def _load_shared_stats(self) -> Dict[str, Any]:
+        """从 Redis 一次读取各统计实体，返回命中的 {实体: 值}（Redis 不可用时为空）"""
+        client = redis_manager.get_client()
+        if client is None:
+            return {}
+        try:
+            values = client.mget(key for key, _, _ in _STATS_CACHE_ENTRIES.values())
+            return {
+                entity: json.loads(value)
+                for entity, value in zip(_STATS_CACHE_ENTRIES, values)
+                if value
+            }
+        except Exception as e:
+            self.logger.debug(f"读取Redis统计缓存失败: {e}")
+            return {}
+
+    def _store_shared_stats(self, fetched: Dict[str, Any]):
+        """将本次查询到的统计实体写入 Redis，各自 TTL 加随机抖动以错开各进程的到期时间"""
+        client = redis_manager.get_client()
+        if client is None or not fetched:
+            return
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                for entity, value in fetched.items():
+                    key, ttl, jitter = _STATS_CACHE_ENTRIES[entity]
+                    ttl += random.uniform(-jitter, jitter)
+                    pipe.setex(key, int(ttl), json.dumps(value))
+                pipe.execute()
+        except Exception as e:
+            self.logger.debug(f"写入Redis统计缓存失败: {e}")
+
     def execute_query(
         self, query: str, params: tuple = None, fetch_all: bool = True
     ) -> List[Dict]:
@@ -884,8 +1143,7 @@ class DatabaseManager(QObject):
             raise Exception("数据库未连接")
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                     cursor.execute(query, params)
 
@@ -895,9 +1153,6 @@ class DatabaseManager(QObject):
                         result = cursor.fetchone()
                         return [dict(result)] if result else []
 
-            finally:
-                self._connection_pool.putconn(conn)
-
         except Exception as e:
             self.logger.error(f"执行查询失败: {e}")
             raise
@@ -908,8 +1163,7 @@ class DatabaseManager(QObject):
             return False
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
                 with conn.cursor() as cursor:
                     columns = list(data.keys())
                     values = list(data.values())
@@ -921,19 +1175,50 @@ class DatabaseManager(QObject):
                 conn.commit()
                 return True
 
-            finally:
-                self._connection_pool.putconn(conn)
-
         except Exception as e:
             self.logger.error(f"插入数据失败: {e}")
             return False
 
+    def execute_insert_many(self, table: str, rows: List[Dict[str, Any]]) -> bool:
+        """批量执行插入操作（列以首行为准，一个连接、一次提交）
+
+        注意：execute_batch 之后 cursor.rowcount 只反映最后一页，不可用于计数
+        """
+        if not rows:
+            return True
+        if not self.is_connected():
+            return False
+
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
+                    columns = list(rows[0].keys())
+                    placeholders = ", ".join(["%s"] * len(columns))
+
+                    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+                    params = [tuple(row[col] for col in columns) for row in rows]
+                    execute_batch(cursor, query, params, page_size=500)
+
+                conn.commit()
+                return True
+
+        except Exception as e:
+            self.logger.error(f"批量插入数据失败: {e}")
+            return False
+
     @Slot()
     def _update_stats_async(self):
         """异步更新统计信息"""
         if not self._connected:
             return
 
+        # 没有界面订阅且缓存未超过5分钟时，跳过数据库查询
+        if (
+            self.receivers(SIGNAL("stats_updated(PyObject)")) == 0
+            and time.time() - self._last_stats_update < 300
+        ):
+            return
+
         try:
 
             task_id = self.thread_pool.submit(
@@ -951,12 +1236,75 @@ class DatabaseManager(QObject):
         """统计工作函数"""
         try:
             stats = self.get_stats()
-            self.stats_updated.emit(stats)
+            # 统计内容未变化时不发射信号，省去跨线程排队
+            stats_key = self._stats_key(stats)
+            if stats_key != self._last_emitted_stats_key:
+                self._last_emitted_stats_key = stats_key
+                self.stats_updated.emit(stats)
             return {"success": True}
         except Exception as e:
             self.logger.error(f"获取统计失败: {e}")
             return {"success": False, "error": str(e)}
 
+    @Slot()
+    def _move_staging_async(self):
+        """异步转存遥测暂存表"""
+        if not self._connected:
+            return
+
+        try:
+            self.thread_pool.submit(
+                task_type=TaskType.BATCH_PROCESSING,
+                func=self.move_telemetry_staging,
+                task_id=f"staging_move_{int(time.time())}",
+                priority=TaskPriority.LOW,
+                timeout=60.0,
+            )
+        except Exception as e:
+            self.logger.error(f"提交暂存转存任务失败: {e}")
+
+    def move_telemetry_staging(self) -> int:
+        """将 telemetry_staging 中的数据在单个事务内转存到 telemetry_data"""
+        if not self.is_connected():
+            return 0
+
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
+                    # 阻塞写入方直到事务结束，保证 INSERT 与 TRUNCATE 之间不丢行
+                    cursor.execute("LOCK TABLE telemetry_staging IN EXCLUSIVE MODE")
+                    cursor.execute(
+                        _MOVE_STAGING_QUERY
+                        if self._telemetry_ts_generated
+                        else _MOVE_STAGING_LEGACY_QUERY
+                    )
+                    moved = cursor.rowcount
+                    if moved:
+                        cursor.execute("TRUNCATE telemetry_staging")
+                conn.commit()
+
+                if moved:
+                    self.logger.debug(f"遥测暂存表已转存: {moved} 条")
+                return moved
+
+        except Exception as e:
+            self.logger.error(f"转存遥测暂存表失败: {e}")
+            return 0
+
+    @staticmethod
+    def _stats_key(stats: DatabaseStats) -> tuple:
+        """用于比较统计是否变化的键（忽略检查时间）"""
+        batch_stats = getattr(stats, "batch_stats", None)
+        return (
+            stats.connected,
+            stats.total_records,
+            stats.telemetry_count,
+            stats.alerts_count,
+            stats.events_count,
+            stats.database_size_mb,
+            tuple(batch_stats.values()) if batch_stats else None,
+        )
+
     @Slot()
     def _health_check(self):
         """健康检查"""
@@ -964,19 +1312,24 @@ class DatabaseManager(QObject):
             return
 
         try:
-            conn = self._connection_pool.getconn()
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT 1;")
-                    cursor.fetchone()
+            with self._connection() as conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                    # 存活探测、连接数、主备状态合并为一次往返
+                    cursor.execute(_HEALTH_CHECK_QUERY)
+                    row = cursor.fetchone()
+
+                self.health_info = {
+                    "connections": row["connections"],
+                    "in_recovery": row["in_recovery"],
+                    "checked_at": time.time(),
+                }
+                if row["in_recovery"]:
+                    self.logger.warning("数据库处于恢复/只读备库状态，写入将失败")
 
                 if not self._connected:
                     self._connected = True
                     self.connection_changed.emit(True, "数据库连接恢复")
 
-            finally:
-                self._connection_pool.putconn(conn)
-
         except Exception as e:
             if self._connected:
                 self._connected = False
@@ -996,6 +1349,10 @@ class DatabaseManager(QObject):
             # 停止定时器
             self.stats_timer.stop()
             self.health_timer.stop()
+            self.staging_timer.stop()
+
+            # 关闭前转存剩余的暂存数据
+            self.move_telemetry_staging()
 
             # 断开连接
             self.disconnect()
@@ -1005,7 +1362,86 @@ class DatabaseManager(QObject):
         except Exception as e:
             self.logger.error(f"关闭数据库管理器失败: {e}")
 
+    def _batch_stats_shard(self) -> Dict[str, int]:
+        """当前线程的批量计数（首次使用时登记，键固定，汇总时无需加锁）"""
+        shard = getattr(self._batch_stats_local, "counts", None)
+        if shard is None:
+            shard = dict.fromkeys(_BATCH_STATS_KEYS, 0)
+            self._batch_stats_local.counts = shard
+            with self._lock:
+                self._batch_stats_shards.append(shard)
+        return shard
+
+    @property
+    def batch_stats(self) -> Dict[str, int]:
+        """批量操作统计快照（各线程计数之和，近似值）"""
+        totals = dict.fromkeys(_BATCH_STATS_KEYS, 0)
+        for shard in list(self._batch_stats_shards):
+            for key, value in shard.items():
+                totals[key] += value
+        return totals
+
+    @contextmanager
+    def _connection(self) -> Iterator[_PreparedConnection]:
+        """从连接池借出连接，用完归还；失效连接直接关闭，不再放回池中复用"""
+        conn = self._connection_pool.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # 仅丢弃这一条失效连接，不必重新检查整个连接池
+            broken = True
+            raise
+        finally:
+            self._connection_pool.putconn(conn, close=broken or bool(conn.closed))
+
+    def _ensure_prepared(self, conn: _PreparedConnection):
+        """首次使用该连接时 PREPARE 常用语句（表结构需已初始化）
+
+        PREPARE 不受事务回滚影响：多条语句中途失败时，已成功的那几条仍留在会话中，
+        因此每次先 DEALLOCATE ALL 清空，重试时不会因"语句已存在"而永久失败
+        """
+        if conn.statements_prepared:
+            return
+        with conn.cursor() as cursor:
+            cursor.execute("DEALLOCATE ALL")
+            conn.prepared_queries.clear()
+            cursor.execute(_PREPARED_STATEMENTS)
+        conn.statements_prepared = True
+
+    def _execute_select(self, conn: _PreparedConnection, cursor, query, params):
+        """在本会话中执行查询形状对应的预备语句（首次用到时 PREPARE）"""
+        self._ensure_prepared(conn)
+        if query.name not in conn.prepared_queries:
+            cursor.execute(query.prepare)
+            conn.prepared_queries.add(query.name)
+        cursor.execute(query.execute, params)
+
     # 设备信息 upsert
+    @staticmethod
+    def _device_row(info: dict) -> tuple:
+        """构造 devices 表的 upsert 行（时间字段兼容 float 时间戳与 datetime）"""
+        # 转换时间戳为 datetime
+        last_update_ts = (
+            info.get("status", {}).get("last_update")
+            or info.get("last_update")
+            or info.get("timestamp")
+        )
+        last_seen = (
+            datetime.fromtimestamp(last_update_ts) if last_update_ts else datetime.now()
+        )
+        first_seen = info.get("first_seen") or datetime.now()
+        if isinstance(first_seen, (int, float)):
+            first_seen = datetime.fromtimestamp(first_seen)
+        return (
+            info.get("device_id"),
+            info.get("device_type"),
+            info.get("vendor"),
+            first_seen,
+            last_seen,
+            info.get("description", ""),
+        )
+
     def upsert_device_info(self, info: dict) -> bool:
         """
         插入或更新设备信息（如已存在则更新last_seen、status等）
@@ -1017,62 +1453,99 @@ class DatabaseManager(QObject):
             device_id = info.get("device_id")
             if not device_id:
                 return False
-            # 转换时间戳为 datetime
-            last_update_ts = info.get("status", {}).get("last_update") or info.get(
-                "timestamp"
-            )
-            last_seen = (
-                datetime.fromtimestamp(last_update_ts)
-                if last_update_ts
-                else datetime.now()
-            )
-            conn = self._connection_pool.getconn()
+            with self._connection() as conn:
+                self._ensure_prepared(conn)
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "EXECUTE upsert_device_v1 (%s, %s, %s, %s, %s, %s)",
+                        self._device_row(info),
+                    )
+                conn.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"upsert_device_info失败: {e}")
+            return False
 
-            try:
+    def upsert_devices_bulk(self, infos: List[dict]) -> bool:
+        """
+        批量插入或更新设备信息：一个连接、一条多行 upsert、一次提交
+        （description 仅在插入时写入，已有设备的描述不被覆盖）
+        """
+        if not self.is_connected():
+            return False
+        rows = [self._device_row(info) for info in infos if info.get("device_id")]
+        if not rows:
+            return True
+        try:
+            with self._connection() as conn:
                 with conn.cursor() as cursor:
                     query = """
                         INSERT INTO devices (device_id, device_type, vendor, first_seen, last_seen, description)
-                        VALUES (%s, %s, %s, %s, %s, %s)
+                        VALUES %s
                         ON CONFLICT (device_id) DO UPDATE SET
                             device_type=EXCLUDED.device_type,
                             vendor=EXCLUDED.vendor,
-                            last_seen=EXCLUDED.last_seen,
-                            description=EXCLUDED.description
+                            last_seen=EXCLUDED.last_seen
                     """
+                    execute_values(cursor, query, rows, page_size=500)
+                conn.commit()
+                return True
+        except Exception as e:
+            self.logger.error(f"upsert_devices_bulk失败: {e}")
+            return False
+
+    def touch_devices(self, device_ids: List[str]) -> bool:
+        """
+        将一组已存在设备的 last_seen 更新为当前时间（一条 UPDATE，数组参数）
+        """
+        if not device_ids:
+            return True
+        if not self.is_connected():
+            return False
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
                     cursor.execute(
-                        query,
-                        (
-                            info.get("device_id"),
-                            info.get("device_type"),
-                            info.get("vendor"),
-                            info.get("first_seen") or datetime.now(),
-                            last_seen,
-                            info.get("description", ""),
-                        ),
+                        "UPDATE devices SET last_seen = now() WHERE device_id = ANY(%s)",
+                        (list(device_ids),),
                     )
                 conn.commit()
                 return True
-            finally:
-                self._connection_pool.putconn(conn)
         except Exception as e:
-            self.logger.error(f"upsert_device_info失败: {e}")
+            self.logger.error(f"touch_devices失败: {e}")
             return False
 
     # 查询所有设备信息
-    def get_all_devices(self) -> list:
+    def get_all_devices(
+        self, limit: Optional[int] = None, after_device_id: Optional[str] = None
+    ) -> list:
         """
-        获取所有设备信息（返回list[dict]）
+        获取设备信息（返回list[dict]，时间字段为ISO字符串）；按 device_id 键集分页：after_device_id 之后最多 limit 条
         """
         if not self.is_connected():
             return []
+        conditions = []
+        params: List[Any] = []
+        if after_device_id is not None:
+            conditions.append("device_id > %s")
+            params.append(after_device_id)
+        query = "SELECT * FROM devices"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY device_id"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        # 由服务端聚合为一个 JSON 数组，客户端只解码一次，不再逐行构造 RealDictRow
+        query = (
+            "SELECT COALESCE(jsonb_agg(to_jsonb(d) ORDER BY d.device_id), '[]') "
+            f"AS devices FROM ({query}) d"
+        )
         try:
-            conn = self._connection_pool.getconn()
-            try:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute("SELECT * FROM devices ORDER BY device_id")
-                    return [dict(row) for row in cursor.fetchall()]
-            finally:
-                self._connection_pool.putconn(conn)
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchone()[0]
         except Exception as e:
             self.logger.error(f"get_all_devices失败: {e}")
             return []
@@ -1082,16 +1555,12 @@ class DatabaseManager(QObject):
         if not self.is_connected():
             return None
         try:
-            conn = self._connection_pool.getconn()
-            try:
+            with self._connection() as conn:
+                self._ensure_prepared(conn)
                 with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute(
-                        "SELECT * FROM devices WHERE device_id=%s", (device_id,)
-                    )
+                    cursor.execute("EXECUTE get_device_v1 (%s)", (device_id,))
                     row = cursor.fetchone()
                     return dict(row) if row else None
-            finally:
-                self._connection_pool.putconn(conn)
         except Exception as e:
             self.logger.error(f"get_device_info失败: {e}")
             return None
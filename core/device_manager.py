@@ -1,9 +1,12 @@
 import time
 import logging
-from typing import Dict, Any, Optional, List
-from PySide6.QtCore import QObject, Signal, Slot, QTimer
+from typing import Dict, Any, Optional, List, Tuple
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal, Slot, QTimer, Qt
 from core.data_bus import get_data_bus, DataChannel, DataMessage
 from core.database_manager import get_db_manager
+from core.thread_pool import TaskType, TaskPriority, get_thread_pool
 
 
 class DeviceManager(QObject):
@@ -14,15 +17,53 @@ class DeviceManager(QObject):
     device_list_updated = Signal(list)  # 设备列表变更
     device_statistics_updated = Signal(str, dict)  # 单设备统计变更
     device_discovered = Signal(str, dict)  # 新设备发现
+    _devices_page_loaded = Signal(list)  # 后台加载的一页设备（内部使用）
+    _list_update_requested = Signal()  # 请求启动列表合并定时器（内部使用）
+    _devices_persisted = Signal(list)  # 后台已写入 devices 表的设备ID（内部使用）
+
+    # 启动时从数据库分页加载设备的每页条数
+    LOAD_PAGE_SIZE = 1000
 
     def __init__(self, parent: Optional[QObject] = None):
         super().__init__(parent)
         self.logger = logging.getLogger("DeviceManager")
         self.data_bus = get_data_bus()
         self.db_manager = get_db_manager()
+        self.thread_pool = get_thread_pool()
+        # 设备静态信息（device_id/device_type/vendor/first_seen）
         self.device_data_dict: Dict[str, Dict[str, Any]] = {}
         self.device_stats: Dict[str, dict] = {}
 
+        # 在线状态按列存储（SoA），离线扫描为一次向量比较
+        self._ids: List[str] = []
+        self._id_index: Dict[str, int] = {}
+        self._last_update = np.zeros(64, dtype=np.float64)
+        self._online = np.zeros(64, dtype=np.bool_)
+        self._persisted = np.zeros(64, dtype=np.bool_)  # devices 表中是否已有该行
+        self._last_refresh = 0.0
+
+        # 设备ID列表快照：仅在设备增删时失效
+        self._keys_snapshot: Optional[List[str]] = None
+        self._keys_tuple: Optional[Tuple[str, ...]] = None
+
+        # 设备列表变更合并通知：250ms 内多次变化只发射一次
+        self._devices_dirty = False
+        self._list_update_timer = QTimer(self)
+        self._list_update_timer.setSingleShot(True)
+        self._list_update_timer.setInterval(250)
+        self._list_update_timer.timeout.connect(self._emit_device_list_updated)
+        # DataBus 回调可能运行在发布方线程，QTimer 只能在所属线程启动，经排队信号转到主线程
+        self._list_update_requested.connect(
+            self._start_list_update_timer, Qt.QueuedConnection
+        )
+
+        # 后台分页加载结果回到主线程合并
+        self._devices_page_loaded.connect(self._on_devices_page_loaded)
+
+        # last_seen 持久化在线程池执行，同一时刻至多一个任务；结果回到主线程标记
+        self._persist_in_flight = False
+        self._devices_persisted.connect(self._on_devices_persisted)
+
         # 定时器：定期刷新设备在线状态并持久化
         self.status_timer = QTimer(self)
         self.status_timer.timeout.connect(self.refresh_all_device_status)
@@ -43,47 +84,162 @@ class DeviceManager(QObject):
             return
 
         now = time.time()
-        if device_id not in self.device_data_dict:
+        index = self._id_index.get(device_id)
+        if index is None:
             # 首次发现设备
-            self.device_data_dict[device_id] = {
-                "device_id": device_id,
-                "device_type": msg.data.get("device_type", "UNKNOWN"),
-                "vendor": msg.data.get("vendor", "UNKNOWN"),
-                "first_seen": now,
-                "last_update": now,
-                "online": True,
-            }
-            self.device_discovered.emit(device_id, self.device_data_dict[device_id])
+            index = self._register_device(
+                {
+                    "device_id": device_id,
+                    "device_type": msg.data.get("device_type", "UNKNOWN"),
+                    "vendor": msg.data.get("vendor", "UNKNOWN"),
+                    "first_seen": now,
+                }
+            )
+            self._last_update[index] = now
+            self._online[index] = True
+            self.device_discovered.emit(device_id, self._device_view(index))
+            self._schedule_device_list_update()
         else:
-            # 更新最后活跃时间，设为在线
-            self.device_data_dict[device_id]["last_update"] = now
-            self.device_data_dict[device_id]["online"] = True
+            # 更新最后活跃时间；仅离线→在线时才需要通知列表
+            self._last_update[index] = now
+            if not self._online[index]:
+                self._online[index] = True
+                self._schedule_device_list_update()
+
+    def _schedule_device_list_update(self):
+        """标记设备列表已变化，由单次定时器合并后统一发射（可在任意线程调用）"""
+        if self._devices_dirty:
+            return  # 已有待发射的更新，定时器到期时会一并带上
+        self._devices_dirty = True
+        self._list_update_requested.emit()
+
+    @Slot()
+    def _start_list_update_timer(self):
+        if not self._list_update_timer.isActive():
+            self._list_update_timer.start()
+
+    @Slot()
+    def _emit_device_list_updated(self):
+        if not self._devices_dirty:
+            return
+        self._devices_dirty = False
+        self.device_list_updated.emit(self._device_keys())
+
+    def _device_keys(self) -> List[str]:
+        """当前设备ID列表（缓存快照，设备集合不变时不重复复制）"""
+        if self._keys_snapshot is None:
+            self._keys_snapshot = list(self._ids)
+        return self._keys_snapshot
 
-        self.device_list_updated.emit(list(self.device_data_dict.keys()))
+    def _invalidate_device_keys(self):
+        self._keys_snapshot = None
+        self._keys_tuple = None
+
+    def _register_device(self, info: Dict[str, Any], persisted: bool = False) -> int:
+        """登记设备静态信息并分配状态数组下标（容量不足时倍增）"""
+        device_id = info["device_id"]
+        index = len(self._ids)
+        if index == len(self._last_update):
+            capacity = index * 2
+            self._last_update = np.resize(self._last_update, capacity)
+            self._online = np.resize(self._online, capacity)
+            self._persisted = np.resize(self._persisted, capacity)
+        self._last_update[index] = 0.0
+        self._online[index] = False
+        self._persisted[index] = persisted
+        self._ids.append(device_id)
+        self._id_index[device_id] = index
+        self.device_data_dict[device_id] = info
+        self._invalidate_device_keys()
+        return index
+
+    def _device_view(self, index: int) -> dict:
+        """按下标组装设备信息字典（静态信息 + 当前状态）"""
+        info = dict(self.device_data_dict[self._ids[index]])
+        info["last_update"] = float(self._last_update[index])
+        info["online"] = bool(self._online[index])
+        return info
 
     def refresh_all_device_status(self):
         """定时刷新所有设备的在线/离线状态，并持久化在线设备的 last_seen"""
+        count = len(self._ids)
+        if not count:
+            return
         now = time.time()
-        changed: bool = False
-        for device_id, info in self.device_data_dict.items():
-            last_update = info.get("last_update", 0)
-            if info.get("online", False) and (now - last_update) >= 30:
-                info["online"] = False
-                changed = True
-                self.logger.info(f"设备自动离线: {device_id}")
-        if changed:
-            self.device_list_updated.emit(list(self.device_data_dict.keys()))
+        online = self._online[:count]
+        went_offline = online & ((now - self._last_update[:count]) >= 30)
+        if went_offline.any():
+            online[went_offline] = False
+            for index in np.flatnonzero(went_offline):
+                self.logger.info(f"设备自动离线: {self._ids[index]}")
+            self.device_list_updated.emit(self._device_keys())
+
+        # 数据库未连接或上一轮写入仍在进行时跳过；_last_refresh 不推进，活动留待下一轮
+        if self._persist_in_flight or not self.db_manager.is_connected():
+            return
+
+        # 仅上次刷新后有活动的设备需要更新 last_seen：
+        # 新设备一次批量 upsert，已入库设备一次 UPDATE ... ANY()，每轮至多两次往返
+        active = online & (self._last_update[:count] > self._last_refresh)
+        self._last_refresh = now
+        persisted = self._persisted[:count]
+        new_indices = np.flatnonzero(active & ~persisted)
+        touched_indices = np.flatnonzero(active & persisted)
+        if not (new_indices.size or touched_indices.size):
+            return
+        self._persist_in_flight = True
+        self.thread_pool.submit(
+            task_type=TaskType.DATA_PROCESSING,
+            func=self._persist_devices_worker,
+            new_devices=[self._device_view(index) for index in new_indices],
+            touched_ids=[self._ids[index] for index in touched_indices],
+            task_id=f"persist_devices_{int(now * 1000)}",
+            priority=TaskPriority.LOW,
+        )
+
+    def _persist_devices_worker(
+        self, new_devices: List[dict], touched_ids: List[str]
+    ) -> dict:
+        """线程池：写入新设备并批量更新已入库设备的 last_seen"""
+        persisted_ids = []
+        try:
+            if new_devices and self.persist_devices_bulk(new_devices):
+                persisted_ids = [info["device_id"] for info in new_devices]
+            if touched_ids and not self.db_manager.touch_devices(touched_ids):
+                self.logger.error(f"设备 last_seen 批量更新失败: {len(touched_ids)} 台")
+        finally:
+            # 无论成败都要交回主线程，清除进行中标记
+            self._devices_persisted.emit(persisted_ids)
+        return {"success": True, "persisted": len(persisted_ids)}
+
+    @Slot(list)
+    def _on_devices_persisted(self, device_ids: list):
+        """主线程：标记已写入 devices 表的设备"""
+        self._persist_in_flight = False
+        for device_id in device_ids:
+            index = self._id_index.get(device_id)
+            if index is not None:
+                self._persisted[index] = True
 
     def get_device_info(self, device_id: str) -> Optional[dict]:
-        return self.device_data_dict.get(device_id)
+        index = self._id_index.get(device_id)
+        return None if index is None else self._device_view(index)
 
-    def get_all_devices(self) -> List[str]:
-        return list(self.device_data_dict.keys())
+    def get_all_devices(self) -> Tuple[str, ...]:
+        """所有设备ID（只读元组，设备集合不变时返回同一对象）"""
+        if self._keys_tuple is None:
+            self._keys_tuple = tuple(self._ids)
+        return self._keys_tuple
 
     def clear_all(self):
         self.device_data_dict.clear()
         self.device_stats.clear()
-        self.device_list_updated.emit([])
+        self._ids.clear()
+        self._id_index.clear()
+        self._online[:] = False
+        self._persisted[:] = False
+        self._invalidate_device_keys()
+        self.device_list_updated.emit(self._device_keys())
 
     def persist_device_info(self, info: dict):
         """将设备信息写入数据库（仅更新 last_seen）"""
@@ -93,20 +249,62 @@ class DeviceManager(QObject):
         else:
             self.logger.error(f"设备持久化失败: {info['device_id']}")
 
+    def persist_devices_bulk(self, infos: List[dict]) -> bool:
+        """批量将设备信息写入数据库（单次往返、单次提交）"""
+        success = self.db_manager.upsert_devices_bulk(infos)
+        if success:
+            self.logger.debug(f"设备信息已批量写入: {len(infos)} 台")
+        else:
+            self.logger.error(f"设备批量持久化失败: {len(infos)} 台")
+        return success
+
     def load_devices_from_db(self):
-        """从数据库加载设备信息（仅基本信息，状态默认离线）"""
-        devices = self.db_manager.get_all_devices()
+        """从数据库加载设备信息（后台分页加载，仅基本信息，状态默认离线）"""
+        try:
+            self.thread_pool.submit(
+                task_type=TaskType.DATA_PROCESSING,
+                func=self._load_devices_worker,
+                task_id=f"load_devices_{int(time.time() * 1000)}",
+                priority=TaskPriority.LOW,
+            )
+        except Exception as e:
+            self.logger.error(f"提交设备加载任务失败: {e}")
+
+    def _load_devices_worker(self) -> dict:
+        """按 device_id 键集分页读取设备，每页通过信号交给主线程合并"""
+        after_device_id = None
+        loaded = 0
+        while True:
+            devices = self.db_manager.get_all_devices(
+                limit=self.LOAD_PAGE_SIZE, after_device_id=after_device_id
+            )
+            if not devices:
+                break
+            self._devices_page_loaded.emit(devices)
+            loaded += len(devices)
+            if len(devices) < self.LOAD_PAGE_SIZE:
+                break
+            after_device_id = devices[-1]["device_id"]
+        self.logger.info(f"已从数据库加载设备: {loaded} 台")
+        return {"success": True, "loaded": loaded}
+
+    @Slot(list)
+    def _on_devices_page_loaded(self, devices: list):
+        """合并一页数据库设备（已在线的设备保留实时状态）"""
         for info in devices:
             device_id = info["device_id"]
-            self.device_data_dict[device_id] = {
-                "device_id": device_id,
-                "device_type": info.get("device_type", "UNKNOWN"),
-                "vendor": info.get("vendor", "UNKNOWN"),
-                "first_seen": info.get("first_seen"),
-                "last_update": 0,
-                "online": False,
-            }
-        self.device_list_updated.emit(list(self.device_data_dict.keys()))
+            if device_id in self._id_index:
+                continue
+            self._register_device(
+                {
+                    "device_id": device_id,
+                    "device_type": info.get("device_type", "UNKNOWN"),
+                    "vendor": info.get("vendor", "UNKNOWN"),
+                    "first_seen": info.get("first_seen"),
+                },
+                persisted=True,
+            )
+        self.device_list_updated.emit(self._device_keys())
 
 
 _device_manager = None
@@ -1,43 +1,67 @@
 import time
 import logging
-from typing import Optional, Any
-from PySide6.QtCore import QTimer, Qt, Slot
+import itertools
+from collections import deque
+from typing import Optional, Any, List
+from PySide6.QtCore import QObject, QTimer, Slot
 from .data_bus import DataBus, DataChannel, DataMessage
 from .redis_manager import redis_manager, redis_buffer
-from .thread_pool import thread_pool, TaskType, TaskPriority
+from .thread_pool import get_thread_pool, TaskType, TaskPriority
+
+
+def _drain(queue: deque) -> List[Any]:
+    """取出队列中当前全部消息
+
+    排空工作线程与强制刷新可能同时取同一队列，按 len 预先确定次数会在对方先取走后
+    抛出 IndexError，因此逐条 popleft 直到队列为空
+    """
+    messages = []
+    popleft = queue.popleft
+    while True:
+        try:
+            messages.append(popleft())
+        except IndexError:
+            return messages
 
 
 class EnhancedDataBus(DataBus):
     """增强版数据总线 - 集成Redis缓冲 + 线程池协调"""
 
-    def __init__(self, enable_redis_buffer: bool = True):
-        super().__init__()
+    # 🔥 Redis写入触发条件：积压条数或最早消息等待时间，先到先写
+    REDIS_FLUSH_SIZE = 256
+    REDIS_FLUSH_LATENCY = 0.2  # 秒
+
+    def __init__(
+        self, enable_redis_buffer: bool = True, parent: Optional[QObject] = None
+    ):
+        super().__init__(parent)
         self.redis_buffer_enabled = enable_redis_buffer
         self.logger = logging.getLogger("EnhancedDataBus")
 
         # 🔥 线程池集成
-        self.thread_pool = thread_pool
+        self.thread_pool = get_thread_pool()
 
-        # 🔥 连接线程池信号 - 使用正确的信号名称
-        self.thread_pool.task_completed.connect(
-            self._on_redis_task_completed, Qt.QueuedConnection
-        )
-        self.thread_pool.task_failed.connect(
-            self._on_redis_task_failed, Qt.QueuedConnection
-        )
+        # 🔥 Redis写入计数由 redis_buffer 自行维护，不再经由线程池完成信号回到主线程
 
-        # 初始化Redis连接
-        if self.redis_buffer_enabled:
-            self._init_redis_connection()
+        # 🔥 Redis写入队列：publish 只入队，由单个排空任务按 Pipeline 批量写入
+        self._redis_queue = deque()
+        self._redis_drain_pending = False
+        self._task_seq = itertools.count()
+        self._first_enqueue_ts = 0.0
 
-        # 🔥 缓冲统计 - 简化版本
+        # 🔥 缓冲统计 - 简化版本（需在初始化Redis连接前创建，连接结果会写入其中）
         self._buffer_stats = {
             "buffered_messages": 0,
             "buffer_errors": 0,
             "redis_connected": False,
             "pending_redis_tasks": 0,
+            "submit_errors": 0,
         }
 
+        # 初始化Redis连接
+        if self.redis_buffer_enabled:
+            self._init_redis_connection()
+
         # 🔥 定时统计和批量刷新
         self._setup_timers()
 
@@ -56,10 +80,10 @@ class EnhancedDataBus(DataBus):
 
     def _setup_timers(self):
         """设置定时器 - 批量刷新和统计更新"""
-        # 🔥 批量刷新定时器 - 强制刷新批量队列
-        self.flush_timer = QTimer()
-        self.flush_timer.timeout.connect(self._force_flush_batches)
-        self.flush_timer.start(30000)  # 30秒强制刷新一次
+        # 🔥 Redis写入队列排空定时器
+        self.drain_timer = QTimer()
+        self.drain_timer.timeout.connect(self._drain_redis_queue)
+        self.drain_timer.start(20)  # 20毫秒检查一次触发条件
 
         # 🔥 连接状态检查定时器
         self.health_timer = QTimer()
@@ -78,64 +102,71 @@ class EnhancedDataBus(DataBus):
         # 1. 🔥 立即发布到内存DataBus（保证实时性）
         success = super().publish(channel, source, data, device_id)
 
-        # 2. 🔥 异步提交Redis缓冲任务（保证持久化，不阻塞UI）
+        # 2. 🔥 入队，由排空任务异步批量写入Redis（保证持久化，不阻塞UI）
         if success and self.redis_buffer_enabled:
-            self._submit_redis_buffer_task(channel, source, data, device_id)
+            if not self._redis_queue:
+                self._first_enqueue_ts = time.monotonic()
+            self._redis_queue.append(
+                DataMessage(
+                    channel=channel, source=source, data=data, device_id=device_id
+                )
+            )
 
         return success
 
-    def _submit_redis_buffer_task(
-        self, channel: DataChannel, source: str, data: Any, device_id: Optional[str]
-    ):
-        """提交Redis缓冲任务到线程池 - 修复参数传递"""
-        try:
-            message = DataMessage(
-                channel=channel, source=source, data=data, device_id=device_id
-            )
+    @Slot()
+    def _drain_redis_queue(self):
+        """积压达到批量上限或最早消息等待超时，且没有排空任务在执行时，提交一个排空任务"""
+        pending = len(self._redis_queue)
+        if not pending or self._redis_drain_pending:
+            return
+        if (
+            pending < self.REDIS_FLUSH_SIZE
+            and time.monotonic() - self._first_enqueue_ts < self.REDIS_FLUSH_LATENCY
+        ):
+            return
 
-            # 🔥 修复：正确传递参数给线程池
+        try:
+            self._redis_drain_pending = True
             task_id = self.thread_pool.submit(
                 TaskType.DATA_PROCESSING,
-                self._redis_buffer_worker,
-                message,
-                task_id=f"redis_{channel.value}_{int(time.time()*1000000)}",
-                priority=TaskPriority.NORMAL,
+                self._redis_drain_worker,
+                task_id=f"redis_drain_{next(self._task_seq)}",
+                priority=TaskPriority.HIGH,
                 timeout=10.0,
-                max_retries=1,  # 🔥 允许1次重试
             )
 
-            if task_id:
-                self._buffer_stats["pending_redis_tasks"] += 1
-                self.logger.debug(f"Redis缓冲任务已提交: {task_id}")
-            else:
-                self._buffer_stats["buffer_errors"] += 1
+            if not task_id:
+                self._redis_drain_pending = False
+                self._buffer_stats["submit_errors"] += 1
 
         except Exception as e:
-            self._buffer_stats["buffer_errors"] += 1
+            self._redis_drain_pending = False
+            self._buffer_stats["submit_errors"] += 1
             self.logger.error(f"提交Redis任务失败: {e}")
 
-    def _redis_buffer_worker(self, message: DataMessage) -> dict:
-        """Redis缓冲工作函数 - 在线程池中执行"""
+    def _redis_drain_worker(self) -> dict:
+        """Redis排空工作函数 - 在线程池中执行，一次Pipeline写入当前队列中的全部消息"""
         start_time = time.time()
         result = {
             "success": False,
-            "channel": message.channel.value,
-            "device_id": message.device_id,
+            "count": 0,
             "execution_time": 0,
             "error": None,
         }
 
         try:
-            # 🔥 在子线程中执行Redis缓冲操作，启用批量模式
-            success = redis_buffer.buffer_message(message, enable_batching=True)
+            messages = _drain(self._redis_queue)
+            written = redis_buffer.buffer_messages(messages)
 
             result.update(
                 {
-                    "success": success,
+                    "success": written == len(messages),
+                    "count": written,
+                    "failed": len(messages) - written,
                     "execution_time": (time.time() - start_time) * 1000,  # 毫秒
                 }
             )
-
             return result
 
         except Exception as e:
@@ -148,70 +179,20 @@ class EnhancedDataBus(DataBus):
             )
             return result
 
-    @Slot(str, object)
-    def _on_redis_task_completed(self, task_id: str, result: dict):
-        """Redis任务完成处理 - 主线程回调"""
-        try:
-            # 🔥 只处理Redis相关任务
-            if not task_id.startswith("redis_"):
-                return
-
-            self._buffer_stats["pending_redis_tasks"] = max(
-                0, self._buffer_stats["pending_redis_tasks"] - 1
-            )
-
-            if result.get("success"):
-                self._buffer_stats["buffered_messages"] += 1
-                execution_time = result.get("execution_time", 0)
-                self.logger.debug(
-                    f"Redis缓冲成功: {result.get('channel')} ({execution_time:.1f}ms)"
-                )
-            else:
-                self._buffer_stats["buffer_errors"] += 1
-                error_msg = result.get("error", "未知错误")
-                self.logger.error(f"Redis缓冲失败: {error_msg}")
-
-        except Exception as e:
-            self.logger.error(f"处理Redis任务完成回调失败: {e}")
-
-    @Slot(str, str)
-    def _on_redis_task_failed(self, task_id: str, error: str):
-        """Redis任务失败处理 - 主线程回调"""
-        try:
-            if not task_id.startswith("redis_"):
-                return
-
-            self._buffer_stats["pending_redis_tasks"] = max(
-                0, self._buffer_stats["pending_redis_tasks"] - 1
-            )
-            self._buffer_stats["buffer_errors"] += 1
-
-            self.logger.error(f"Redis缓冲任务失败 {task_id}: {error}")
-
-        except Exception as e:
-            self.logger.error(f"处理Redis任务失败回调失败: {e}")
-
-    @Slot()
-    def _force_flush_batches(self):
-        """定时强制刷新批量队列 - 确保数据最终写入Redis"""
-        if not self.redis_buffer_enabled:
-            return
-
-        try:
-            # 🔥 使用线程池异步执行批量刷新，避免阻塞主线程
-            task_id = self.thread_pool.submit(
-                task_type=TaskType.BATCH_PROCESSING,
-                func=redis_buffer.force_flush_all_batches,
-                task_id=f"flush_batches_{int(time.time())}",
-                priority=TaskPriority.NORMAL,
-                timeout=30.0,
-            )
-
-            if task_id:
-                self.logger.debug(f"批量刷新任务已提交: {task_id}")
-
-        except Exception as e:
-            self.logger.error(f"提交批量刷新任务失败: {e}")
+        finally:
+            # 排空期间入队的消息可能留在队列中，为其重新计时，避免下一次检查立即提交
+            if self._redis_queue:
+                self._first_enqueue_ts = time.monotonic()
+            self._redis_drain_pending = False
+
+    def _sync_buffer_counters(self):
+        """从 redis_buffer 读取写入计数（线程安全计数器）"""
+        written, failed = redis_buffer.get_write_counters()
+        self._buffer_stats["buffered_messages"] = written
+        self._buffer_stats["buffer_errors"] = (
+            failed + self._buffer_stats["submit_errors"]
+        )
+        self._buffer_stats["pending_redis_tasks"] = int(self._redis_drain_pending)
 
     @Slot()
     def _health_check(self):
@@ -254,6 +235,7 @@ class EnhancedDataBus(DataBus):
                 redis_stats = redis_buffer.get_buffer_stats()
 
                 # 合并统计信息
+                self._sync_buffer_counters()
                 enhanced_stats = self._buffer_stats.copy()
                 enhanced_stats.update(
                     {
@@ -307,8 +289,11 @@ class EnhancedDataBus(DataBus):
             return {"error": "Redis缓冲未启用"}
 
         try:
-            # 🔥 同步执行批量刷新（用于关闭前的最终清理）
+            # 🔥 同步排空写入队列，再刷新批量队列（用于关闭前的最终清理）
+            remaining = _drain(self._redis_queue)
+            written = redis_buffer.buffer_messages(remaining) if remaining else 0
             flush_results = redis_buffer.force_flush_all_batches()
+            flush_results["queue_drained"] = written
 
             # 获取Redis中的数据统计
             buffer_counts = {}
@@ -371,19 +356,18 @@ class EnhancedDataBus(DataBus):
             self.logger.info("正在关闭Enhanced DataBus...")
 
             # 🔥 停止定时器
-            if hasattr(self, "flush_timer"):
-                self.flush_timer.stop()
+            if hasattr(self, "drain_timer"):
+                self.drain_timer.stop()
             if hasattr(self, "health_timer"):
                 self.health_timer.stop()
 
-            # 🔥 强制刷新所有待处理的批量数据
+            # 🔥 写入队列中剩余的消息，并强制刷新所有待处理的批量数据
             if self.redis_buffer_enabled:
                 self.force_flush_buffers()
 
             # 🔥 等待Redis任务完成
-            pending_tasks = self._buffer_stats.get("pending_redis_tasks", 0)
-            if pending_tasks > 0:
-                self.logger.info(f"等待 {pending_tasks} 个Redis任务完成...")
+            if self._redis_drain_pending:
+                self.logger.info("等待Redis排空任务完成...")
                 # 给一些时间让任务完成
                 import time
 
@@ -395,5 +379,20 @@ class EnhancedDataBus(DataBus):
             self.logger.error(f"关闭Enhanced DataBus时发生错误: {e}")
 
 
+_enhanced_data_bus = None
+
+
+def get_enhanced_data_bus() -> EnhancedDataBus:
+    global _enhanced_data_bus
+    if _enhanced_data_bus is None:
+        from PySide6.QtWidgets import QApplication
+
+        app = QApplication.instance()
+        if app is None:
+            raise RuntimeError("QApplication not created!")
+        _enhanced_data_bus = EnhancedDataBus(parent=app)
+    return _enhanced_data_bus
+
+
 # 🔥 全局增强数据总线实例
-enhanced_data_bus = EnhancedDataBus()
+# enhanced_data_bus = EnhancedDataBus()
@@ -1,120 +1,84 @@
 import paho.mqtt.client as mqtt
-import json
+import os
+import zlib
+import socket
+import itertools
+import multiprocessing
+import queue
+import threading
 import time
 import logging
-import msgpack
-from typing import Dict, List, Optional, Callable, Set, Any
+from dataclasses import asdict, dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Callable, Set, Any
 from PySide6.QtCore import QObject, Signal, QTimer, Qt, Slot
 from .thread_pool import get_thread_pool, TaskType, TaskPriority
 from .data_bus import get_data_bus, DataChannel, DataMessage
-
-
-class MessageParser:
-    """统一的消息解析器"""
-
-    @staticmethod
-    def parse_topic(topic: str) -> tuple[str, str]:
-        """解析主题，返回 (clean_topic, format_type)"""
-        if topic.endswith("/msgpack"):
-            return topic[:-8], "msgpack"
-        elif topic.endswith("/json"):
-            return topic[:-5], "json"
-        else:
-            return topic, "auto"
-
-    @staticmethod
-    def parse_payload(payload: bytes, format_hint: str = "auto") -> tuple[Any, str]:
-        """解析载荷，返回 (data, actual_format)"""
-        if format_hint == "msgpack":
-            try:
-                data = msgpack.unpackb(payload, raw=False, strict_map_key=False)
-                return data, "msgpack"
-            except Exception as e:
-                raise ValueError(f"MessagePack解析失败: {e}")
-
-        elif format_hint == "json":
-            try:
-                data = json.loads(payload.decode("utf-8"))
-                return data, "json"
-            except Exception as e:
-                raise ValueError(f"JSON解析失败: {e}")
-
-        else:  # auto detect
-            # 先尝试 MessagePack
-            try:
-                data = msgpack.unpackb(payload, raw=False, strict_map_key=False)
-                return data, "msgpack"
-            except Exception:
-                pass
-
-            # 再尝试 JSON
-            try:
-                data = json.loads(payload.decode("utf-8"))
-                return data, "json"
-            except Exception:
-                pass
-
-            # 尝试纯文本
-            try:
-                text = payload.decode("utf-8")
-                return {"text": text}, "text"
-            except Exception:
-                pass
-
-            raise ValueError("无法识别数据格式")
-
-
-class TopicRouter:
-    """主题路由器"""
-
-    @staticmethod
-    def parse_device_topic(topic: str) -> Optional[dict]:
-        """解析设备主题: factory/telemetry/{device_type}/{device_id}"""
-        parts = topic.split("/")
-        if len(parts) >= 4 and parts[0] == "factory" and parts[1] == "telemetry":
-            device_type = parts[2]
-            device_id = parts[3]
-
-            # 解析设备ID获取厂商
-            id_parts = device_id.split("_")
-            vendor = id_parts[0] if len(id_parts) > 0 else "UNKNOWN"
-            # self.logger.debug(
-            #     f"解析设备主题: {topic} -> {device_type}, {device_id}, {vendor}"
-            # )
-            return {
-                "device_id": device_id,
-                "device_type": device_type,
-                "vendor": vendor,
-                "topic_type": "telemetry",
-            }
-
-        return None
-
-    @staticmethod
-    def parse_gateway_topic(topic: str) -> Optional[dict]:
-        """解析网关主题: gateway/{gateway_id}/{function}"""
-        parts = topic.split("/")
-        if len(parts) >= 3 and parts[0] == "gateway":
-            return {
-                "device_id": parts[1],
-                "device_type": "GATEWAY",
-                "vendor": "SYSTEM",
-                "function": parts[2],
-                "topic_type": "gateway",
-            }
-        return None
-
-    @staticmethod
-    def classify_topic(topic: str) -> str:
-        """分类主题类型"""
-        clean_topic, _ = MessageParser.parse_topic(topic)
-
-        if TopicRouter.parse_device_topic(clean_topic):
-            return "device_telemetry"
-        elif TopicRouter.parse_gateway_topic(clean_topic):
-            return "gateway"
-        else:
-            return "system"
+from .telemetry_parser import (
+    MessageParser,
+    TopicRouter,
+    create_error_result,
+    parse_device_batch,
+)
+
+
+# 遥测发布批次：满 PUB_BATCH_SIZE 条立即发布，否则每 PUB_FLUSH_INTERVAL_MS 发布一次
+PUB_BATCH_SIZE = 100
+PUB_FLUSH_INTERVAL_MS = 20
+
+# 设备消息解析批次：满 PARSE_BATCH_SIZE 条立即提交，否则每 PARSE_FLUSH_INTERVAL_MS 提交一次
+PARSE_BATCH_SIZE = 64
+PARSE_FLUSH_INTERVAL_MS = 5
+
+# 线程池回调按任务类型过滤（所有任务的完成/失败都会回调到这里），预先取出枚举值
+_MQTT_TASK_TYPE = TaskType.MQTT_PROCESSING.value
+
+# 同类失败通知（状态信号/错误日志）的最小间隔，失败风暴时合并为一次
+STATUS_MIN_INTERVAL = 0.5
+_REPORT_KEYS_LIMIT = 256
+
+# 设备解析结果的全部下游频道：均无订阅者时跳过解析
+_PARSED_OUTPUT_CHANNELS = (
+    DataChannel.TELEMETRY_DATA,
+    DataChannel.DEVICE_EVENTS,
+    DataChannel.ERRORS,
+)
+
+# 错误事件批次：失败风暴时按批发布到 ERRORS 频道
+ERROR_BATCH_SIZE = 64
+ERROR_FLUSH_INTERVAL_MS = 50
+
+# 客户端网络参数：放大 QoS>0 在途窗口、不限制出站队列、放大接收缓冲区
+MAX_INFLIGHT_MESSAGES = 200
+SOCKET_RCVBUF_SIZE = 4 * 1024 * 1024
+
+# 并行 MQTT 客户端数：订阅过滤器按分片键哈希分配，各客户端独立的 TCP 连接与网络线程。
+# 分片键为过滤器首个通配层级之前的字面前缀，同一设备的全部主题始终经同一连接到达（保持顺序）
+MQTT_CLIENT_COUNT = 4
+_SHARED_SUBSCRIPTION_PREFIX = "$share/"
+# 设备类型层级为通配符的遥测过滤器：配置 shard_device_types 后按类型拆分到不同分片
+_TELEMETRY_TYPE_WILDCARD = "factory/telemetry/+/"
+
+# 收件箱容量：分发线程跟不上时丢弃新消息并计数，避免无界堆积耗尽内存
+INBOX_MAX_SIZE = 100000
+# 分发线程停止哨兵
+_INBOX_STOP = None
+
+
+@dataclass(slots=True)
+class MqttStats:
+    """MQTT 消息统计（slots：每条消息的计数更新为固定偏移写入，仅在上报时生成字典）"""
+
+    messages_received: int = 0
+    messages_sent: int = 0
+    connection_drops: int = 0
+    last_message_time: Optional[float] = None
+    bytes_received: int = 0
+    connection_time: Optional[float] = None
+    messages_skipped: int = 0  # 下游无订阅者而跳过解析的设备消息
+    messages_dropped: int = 0  # 收件箱已满而丢弃的消息
 
 
 class MqttManager(QObject):
@@ -123,7 +87,14 @@ class MqttManager(QObject):
     statistics_updated = Signal(dict)  # 统计信息更新
     topic_subscribed = Signal(str, bool)  # 主题订阅结果：(主题, 是否成功)
     connection_status = Signal(str)  # 连接状态文本
-    message_received = Signal(str, bytes, int)  # (主题, 载荷, QoS)
+    _device_batch_parsed = Signal(
+        int, object
+    )  # 整批解析完成：(批次序号, [(任务序号, 结果), ...])
+    _shard_state_changed = Signal()  # 某个分片客户端连接或断开
+    _parse_flush_requested = Signal()  # 待解析批次收到首条消息，需启动刷新定时器
+    _gateway_event_decoded = Signal(
+        int, object
+    )  # 网关载荷解码完成：(网关序号, 事件或None)
 
     def __init__(self, parent: Optional[QObject] = None):
         super().__init__()
@@ -131,20 +102,32 @@ class MqttManager(QObject):
 
         self.thread_pool = get_thread_pool()
         self.data_bus = get_data_bus()
-        self.client: Optional[mqtt.Client] = None
-        self.connected = False
+        self.clients: List[mqtt.Client] = []
+        self.client: Optional[mqtt.Client] = None  # 主客户端（clients[0]）
+        # 任一分片客户端已连接（网络线程写、Qt 线程读）
+        self._connected_evt = threading.Event()
+        self._connected_clients: Set[int] = set()
+        self._reconnect_enabled = False  # 主动断开后不再重连
         self.connection_config = {
             "host": "localhost",
             "port": 1883,
             "keepalive": 60,
             "username": "",
             "password": "",
+            # 按设备类型拆分 factory/telemetry/+/... 通配订阅（须列全设备类型，未列出的类型收不到）
+            "shard_device_types": [],
+            # 可选：以共享订阅 $share/<share_group>/... 与其他实例分摊消息
+            # （代理须支持共享订阅，且共享订阅不投递保留消息）
+            "shared_subscription": False,
+            "share_group": "chipmonitor",
         }
 
         # 订阅管理
         self.subscriptions: Dict[str, int] = {}  # topic: qos
         # 设备管理
         self.known_devices: Set[str] = set()
+        # 已发现设备的只读快照，设备集合变化时失效
+        self._devices_snapshot: Optional[Mapping[str, dict]] = None
         # 重连机制
         self.reconnect_timer = QTimer()
         self.reconnect_timer.timeout.connect(self._attempt_reconnect)
@@ -153,23 +136,82 @@ class MqttManager(QObject):
         self.max_reconnect_attempts = 10
 
         # 消息统计
-        self.stats = {
-            "messages_received": 0,
-            "messages_sent": 0,
-            "connection_drops": 0,
-            "last_message_time": None,
-            "bytes_received": 0,
-            "connection_time": None,
-        }
+        self.stats = MqttStats()
+
+        # 失败通知去重：键为失败类别（错误信息前缀），值为上次通知的单调时钟
+        self._last_report: Dict[str, float] = {}
 
-        # 统计定时器
+        # 连接/发送计数由各分片网络线程并发更新，需加锁；
+        # 接收计数只由分发线程写入（单写者），无需加锁
+        self._stats_lock = threading.Lock()
+
+        # 统计定时器（仅在已连接期间运行，断开时停止，避免空闲时周期性构造统计快照）
         self.stats_timer = QTimer()
+        self.stats_timer.setInterval(2000)  # 每2秒发送统计信息
         self.stats_timer.timeout.connect(self._emit_statistics)
-        self.stats_timer.start(2000)  # 每2秒发送统计信息
+        # 连接状态由网络线程发出，排队到主线程启停定时器（QTimer 只能在所属线程操作）
+        self.connection_changed.connect(
+            self._on_connection_changed, Qt.QueuedConnection
+        )
+        # 分片连接状态变化同样排队到主线程，按需启停重连定时器
+        self._shard_state_changed.connect(
+            self._update_reconnect_timer, Qt.QueuedConnection
+        )
 
-        self.thread_pool.task_completed.connect(
-            self._on_device_data_processed, Qt.QueuedConnection
+        # 以下各批次的刷新定时器同样只在已连接期间运行（见 _on_connection_changed）；
+        # 定时器停止时到达的零散数据直接提交/发布，不在批次中滞留
+
+        # 遥测数据批量发布：攒批后整批进入数据总线，摊薄加锁与信号分发开销
+        self._pub_batch: List[tuple] = []
+        self.pub_flush_timer = QTimer()
+        self.pub_flush_timer.setInterval(PUB_FLUSH_INTERVAL_MS)
+        self.pub_flush_timer.timeout.connect(self._flush_pub_batch)
+
+        # 错误事件批量发布（消息格式不变，逐条投递给订阅者）
+        self._err_batch: List[tuple] = []
+        self.err_flush_timer = QTimer()
+        self.err_flush_timer.setInterval(ERROR_FLUSH_INTERVAL_MS)
+        self.err_flush_timer.timeout.connect(self._flush_error_batch)
+
+        # 遥测解析进程池（CPU密集的解码/映射绕开GIL并行执行），首次使用时创建
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._parse_pool_lock = threading.Lock()
+        self._task_seq = itertools.count()
+        # 各批并行解析、完成先后不定：主线程按批次序号依次发布，保持同一设备的消息顺序
+        self._batch_seq = itertools.count()  # 在 _pending_parse_lock 内取号
+        self._batch_next = 0  # 下一个待发布的批次序号（主线程）
+        self._batch_pending: Dict[int, List[tuple]] = {}  # 先于前序完成的批次
+        self._device_batch_parsed.connect(
+            self._on_device_batch_parsed, Qt.QueuedConnection
         )
+
+        # 网关消息：线程池并行解码，主线程按到达序号依次发布（订阅方只在主线程被调用）
+        self._gateway_seq = itertools.count()  # 仅分发线程取号
+        self._gateway_next = 0  # 下一个待发布的序号（主线程）
+        self._gateway_pending: Dict[int, Optional[dict]] = {}  # 先于前序完成的事件
+        self._gateway_event_decoded.connect(
+            self._publish_gateway_event, Qt.QueuedConnection
+        )
+
+        # 待解析消息批次：满 PARSE_BATCH_SIZE 条由分发线程提交，否则由定时器提交。
+        # 单次定时器仅在空批次收到首条消息时启动，空闲时不唤醒事件循环
+        self._pending_parse: List[tuple] = []
+        self._pending_parse_lock = threading.Lock()
+        self.parse_flush_timer = QTimer()
+        self.parse_flush_timer.setSingleShot(True)
+        self.parse_flush_timer.setInterval(PARSE_FLUSH_INTERVAL_MS)
+        self.parse_flush_timer.timeout.connect(self._flush_parse_batch)
+        self._parse_flush_requested.connect(
+            self._start_parse_flush_timer, Qt.QueuedConnection
+        )
+
+        # 消息收件箱：网络线程只负责入队，分类与分发由独立的分发线程完成（有界，满时丢弃）
+        self._inbox: "queue.Queue[Optional[tuple]]" = queue.Queue(INBOX_MAX_SIZE)
+        self._dispatch_thread = threading.Thread(
+            target=self._dispatch_loop, name="MqttDispatcher", daemon=True
+        )
+        self._dispatch_thread.start()
+
         self.thread_pool.task_failed.connect(
             self._on_device_data_processing_failed, Qt.QueuedConnection
         )
@@ -195,33 +237,27 @@ class MqttManager(QObject):
                 self.connection_config["password"] = password
 
             # 断开现有连接
-            if self.client:
+            if self.clients:
                 self.disconnect()
 
-            # 创建新客户端
-            client_id = f"chipmonitor_{int(time.time())}"
-            self.client = mqtt.Client(client_id=client_id)
-
-            # 设置认证
-            username = self.connection_config["username"]
-            password = self.connection_config["password"]
-            if username and password:
-                self.client.username_pw_set(username, password)
-
-            # 设置回调
-            self.client.on_connect = self._on_connect
-            self.client.on_disconnect = self._on_disconnect
-            self.client.on_message = self._on_message
-            self.client.on_publish = self._on_publish
-            self.client.on_subscribe = self._on_subscribe
+            # 创建分片客户端
+            base_client_id = f"chipmonitor_{int(time.time())}"
+            self._reconnect_enabled = True
+            self.clients = [
+                self._create_client(f"{base_client_id}_{index}", index)
+                for index in range(MQTT_CLIENT_COUNT)
+            ]
+            self.client = self.clients[0]
+            self._connected_clients.clear()
             self.connection_status.emit("正在连接...")
 
-            self.client.connect_async(
-                self.connection_config["host"],
-                self.connection_config["port"],
-                self.connection_config["keepalive"],
-            )
-            self.client.loop_start()
+            for client in self.clients:
+                client.connect_async(
+                    self.connection_config["host"],
+                    self.connection_config["port"],
+                    self.connection_config["keepalive"],
+                )
+                client.loop_start()
 
             return True
 
@@ -232,36 +268,120 @@ class MqttManager(QObject):
             self.connection_status.emit(f"连接失败: {e}")
             return False
 
+    def _create_client(self, client_id: str, index: int) -> mqtt.Client:
+        """创建分片客户端，userdata 为分片序号"""
+        client = mqtt.Client(client_id=client_id, clean_session=True, userdata=index)
+        client.max_inflight_messages_set(MAX_INFLIGHT_MESSAGES)
+        client.max_queued_messages_set(0)  # 0 = 不限制
+
+        # 设置认证
+        username = self.connection_config["username"]
+        password = self.connection_config["password"]
+        if username and password:
+            client.username_pw_set(username, password)
+
+        # 设置回调
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        client.on_publish = self._on_publish
+        client.on_subscribe = self._on_subscribe
+        client.on_socket_open = self._on_socket_open
+        return client
+
+    def _expand_filter(self, topic: str) -> List[str]:
+        """订阅主题对应的实际过滤器（设备类型通配按配置的设备类型拆分）"""
+        device_types = self.connection_config["shard_device_types"]
+        if device_types and topic.startswith(_TELEMETRY_TYPE_WILDCARD):
+            rest = topic[len(_TELEMETRY_TYPE_WILDCARD) :]
+            return [f"factory/telemetry/{dtype}/{rest}" for dtype in device_types]
+        return [topic]
+
+    def _shard_index(self, topic_filter: str) -> int:
+        """过滤器所属分片：按首个通配层级之前的字面前缀哈希（crc32 跨进程稳定）"""
+        levels = []
+        for level in topic_filter.split("/"):
+            if level == "+" or level == "#":
+                break
+            levels.append(level)
+        key = "/".join(levels).encode("utf-8")
+        return zlib.crc32(key) % max(len(self.clients), 1)
+
+    def _client_for_filter(self, topic_filter: str) -> Optional[mqtt.Client]:
+        """返回负责该过滤器且已连接的分片客户端"""
+        if not self.clients:
+            return None
+        index = self._shard_index(topic_filter)
+        if index not in self._connected_clients:
+            return None
+        return self.clients[index]
+
+    def _wire_filter(self, topic_filter: str) -> str:
+        """实际发给代理的过滤器（启用共享订阅时加 $share/<组名>/ 前缀）"""
+        if not self.connection_config["shared_subscription"]:
+            return topic_filter
+        if topic_filter.startswith(_SHARED_SUBSCRIPTION_PREFIX):
+            return topic_filter
+        group = self.connection_config["share_group"]
+        return f"{_SHARED_SUBSCRIPTION_PREFIX}{group}/{topic_filter}"
+
     def disconnect(self):
         """断开连接"""
         try:
-            if self.client and self.connected:
+            self._reconnect_enabled = False
+            if self.clients and self._connected_clients:
                 self.connection_status.emit("正在断开连接...")
-                self.client.loop_stop()
-                self.client.disconnect()
+                for client in self.clients:
+                    client.loop_stop()
+                    client.disconnect()
                 self.reconnect_timer.stop()
+                self._shutdown_parse_pool()
+                self._flush_pub_batch()
+                self._flush_error_batch()
                 self.logger.info("MQTT连接已断开")
         except Exception as e:
             self.logger.error(f"断开连接失败: {e}")
 
+    def shutdown(self, timeout: float = 2.0):
+        """断开连接并停止分发线程（程序退出时调用，之后不可再连接）"""
+        self.disconnect()
+        if not self._dispatch_thread.is_alive():
+            return
+        try:
+            # 哨兵排在已入队消息之后，分发线程处理完剩余消息后退出
+            self._inbox.put(_INBOX_STOP, timeout=timeout)
+        except queue.Full:
+            self.logger.warning("MQTT收件箱已满，分发线程停止哨兵未能入队")
+            return
+        self._dispatch_thread.join(timeout)
+        if self._dispatch_thread.is_alive():
+            self.logger.warning("MQTT分发线程未在超时内退出")
+
     def subscribe_topic(self, topic: str, qos: int = 0) -> bool:
         """订阅主题"""
         try:
-            if self.client and self.connected:
-                result, _ = self.client.subscribe(topic, qos)
-                if result == mqtt.MQTT_ERR_SUCCESS:
-                    self.subscriptions[topic] = qos
-                    self.logger.info(f"订阅主题: {topic} (QoS: {qos})")
-                    return True
-                else:
-                    self.logger.error(f"订阅主题失败: {topic}, 错误码: {result}")
-                    self.topic_subscribed.emit(topic, False)
-                    return False
-            else:
-                # 保存订阅，连接后自动订阅
-                self.subscriptions[topic] = qos
+            result = mqtt.MQTT_ERR_SUCCESS
+            pending = False
+            for topic_filter in self._expand_filter(topic):
+                client = self._client_for_filter(topic_filter)
+                if client is None:
+                    pending = True  # 所属分片未连接，连接回调中自动订阅
+                    continue
+                rc, _ = client.subscribe(self._wire_filter(topic_filter), qos)
+                if rc != mqtt.MQTT_ERR_SUCCESS:
+                    result = rc
+            if result != mqtt.MQTT_ERR_SUCCESS:
+                self.logger.error(f"订阅主题失败: {topic}, 错误码: {result}")
+                self.topic_subscribed.emit(topic, False)
+                return False
+
+            # 保存订阅，分片（重新）连接后自动订阅
+            self.subscriptions[topic] = qos
+            if pending:
                 self.logger.info(f"保存订阅主题: {topic} (连接后将自动订阅)")
-                return True
+            else:
+                self.logger.info(f"订阅主题: {topic} (QoS: {qos})")
+            return True
         except Exception as e:
             self.logger.error(f"订阅主题失败: {e}")
             self.topic_subscribed.emit(topic, False)
@@ -270,13 +390,20 @@ class MqttManager(QObject):
     def unsubscribe_topic(self, topic: str) -> bool:
         """取消订阅主题"""
         try:
-            if self.client and self.connected:
-                result, _ = self.client.unsubscribe(topic)
-                if result == mqtt.MQTT_ERR_SUCCESS:
-                    if topic in self.subscriptions:
-                        del self.subscriptions[topic]
-                    self.logger.info(f"取消订阅主题: {topic}")
-                    return True
+            sent = False
+            result = mqtt.MQTT_ERR_SUCCESS
+            for topic_filter in self._expand_filter(topic):
+                client = self._client_for_filter(topic_filter)
+                if client is None:
+                    continue
+                sent = True
+                rc, _ = client.unsubscribe(self._wire_filter(topic_filter))
+                if rc != mqtt.MQTT_ERR_SUCCESS:
+                    result = rc
+            if sent and result == mqtt.MQTT_ERR_SUCCESS:
+                self.subscriptions.pop(topic, None)
+                self.logger.info(f"取消订阅主题: {topic}")
+                return True
             return False
         except Exception as e:
             self.logger.error(f"取消订阅主题失败: {e}")
@@ -284,11 +411,16 @@ class MqttManager(QObject):
 
     def publish_message(self, topic: str, payload: str, qos: int = 0) -> bool:
         """发布消息"""
-        if self.client and self.connected:
+        client = next(
+            (c for i, c in enumerate(self.clients) if i in self._connected_clients),
+            None,
+        )
+        if client is not None:
             try:
-                result = self.client.publish(topic, payload, qos)
+                result = client.publish(topic, payload, qos)
                 if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                    self.stats["messages_sent"] += 1
+                    with self._stats_lock:
+                        self.stats.messages_sent += 1
                     return True
                 else:
                     self.logger.error(f"发布消息失败: 错误码 {result.rc}")
@@ -299,25 +431,35 @@ class MqttManager(QObject):
         return False
 
     def _on_connect(self, client, userdata, flags, rc):
-        """连接回调"""
+        """连接回调（userdata 为分片序号）"""
         if rc == 0:
-            self.connected = True
-            self.reconnect_timer.stop()
-            self.reconnect_attempts = 0
-            self.stats["connection_time"] = time.time()
+            self._connected_clients.add(userdata)
+
+            # 重新订阅本分片负责的过滤器
+            for topic, qos in list(self.subscriptions.items()):
+                for topic_filter in self._expand_filter(topic):
+                    if self._shard_index(topic_filter) == userdata:
+                        client.subscribe(self._wire_filter(topic_filter), qos)
+                        self.logger.info(
+                            f"重新订阅主题: {topic_filter} (客户端{userdata})"
+                        )
+            self._shard_state_changed.emit()
+
+            # 任一分片就绪即视为已连接（各网络线程并发回调，判定与置位需原子）
+            with self._stats_lock:
+                if self.connected:
+                    return
+                self._connected_evt.set()
+
+            self.stats.connection_time = time.time()
 
             success_msg = "MQTT连接成功"
-            self.logger.info("MQTT连接成功")
+            self.logger.info(f"MQTT连接成功 (客户端{userdata})")
             self.connection_changed.emit(True, success_msg)
             self.connection_status.emit("已连接")
 
-            # 重新订阅所有主题
-            for topic, qos in self.subscriptions.items():
-                client.subscribe(topic, qos)
-                self.logger.info(f"重新订阅主题: {topic}")
-
         else:
-            self.connected = False
+            self._connected_clients.discard(userdata)
             error_msgs = {
                 1: "协议版本不正确",
                 2: "客户端ID无效",
@@ -326,309 +468,253 @@ class MqttManager(QObject):
                 5: "未授权",
             }
             error_msg = error_msgs.get(rc, f"连接失败，错误代码: {rc}")
-            self.logger.error(error_msg)
-            self.connection_changed.emit(False, error_msg)
-            self.connection_status.emit(f"连接失败: {error_msg}")
+            # 各分片客户端会以相同原因同时失败，同类失败只通知一次；
+            # 其他分片仍在线时不改变整体连接状态
+            if self._should_report(f"connect:{rc}"):
+                self.logger.error(f"{error_msg} (客户端{userdata})")
+                if not self.connected:
+                    self.connection_changed.emit(False, error_msg)
+                    self.connection_status.emit(f"连接失败: {error_msg}")
+
+            # 重连未就绪的分片
+            self._shard_state_changed.emit()
+
+    def _should_report(self, key: str) -> bool:
+        """同类失败在 STATUS_MIN_INTERVAL 内只通知一次（错误事件本身仍逐条发布）"""
+        now = time.monotonic()
+        last_report = self._last_report
+        if now - last_report.get(key, float("-inf")) < STATUS_MIN_INTERVAL:
+            return False
+        if len(last_report) >= _REPORT_KEYS_LIMIT:
+            last_report.clear()
+        last_report[key] = now
+        return True
 
-            # 启动重连
-            if self.reconnect_attempts < self.max_reconnect_attempts:
-                self.reconnect_timer.start(self.reconnect_interval)
+    def _on_socket_open(self, client, userdata, sock):
+        """套接字建立回调 —— 关闭 Nagle 并放大接收缓冲区，降低小消息时延"""
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF_SIZE)
+        except (OSError, AttributeError) as e:
+            # WebSocket/TLS 包装的套接字可能不支持，保持默认参数
+            self.logger.debug(f"设置套接字参数失败: {e}")
 
     def _on_disconnect(self, client, userdata, rc):
-        """断开连接回调"""
-        self.connected = False
-        self.stats["connection_drops"] += 1
+        """断开连接回调（userdata 为分片序号）"""
+        self._connected_clients.discard(userdata)
+        with self._stats_lock:
+            self.stats.connection_drops += 1
+            # 最后一个在线分片断开才视为整体断开
+            last_shard = self._connected_evt.is_set() and not self._connected_clients
+            if last_shard:
+                self._connected_evt.clear()
+        # 单独重连断开的分片（主动断开时不重连）
+        self._shard_state_changed.emit()
 
         if rc != 0:
+            self.logger.warning(f"MQTT客户端{userdata}意外断开")
+            if not last_shard:
+                return  # 其他分片仍在线
+
             disconnect_msg = "MQTT意外断开连接"
             self.logger.warning(disconnect_msg)
             self.connection_changed.emit(False, disconnect_msg)
             self.connection_status.emit("连接断开")
-
-            # 启动重连
-            if self.reconnect_attempts < self.max_reconnect_attempts:
-                self.reconnect_timer.start(self.reconnect_interval)
         else:
+            if not last_shard:
+                return  # 等待全部分片断开后再报告
             disconnect_msg = "MQTT正常断开连接"
             self.logger.info(disconnect_msg)
             self.connection_changed.emit(False, disconnect_msg)
             self.connection_status.emit("已断开")
 
     def _on_message(self, client, userdata, msg):
-        """消息接收回调 —— 提交到线程池异步处理"""
+        """消息接收回调（paho 网络线程）—— 仅入队，尽快返回继续读取套接字"""
+        # 每条消息只读一次时钟，作为接收时间贯穿后续处理
         try:
-            self.stats["messages_received"] += 1
-            self.stats["last_message_time"] = time.time()
-            self.stats["bytes_received"] += len(msg.payload)
-            # self.logger.info(f"📥 收到MQTT消息: {topic} | {len(payload)}字节")
-            topic_type = TopicRouter.classify_topic(msg.topic)
-            if topic_type == "device_telemetry":
-                self._handle_device_message(msg.topic, msg.payload, msg.qos)
-            elif topic_type == "gateway":
-                self._handle_gateway_message(msg.topic, msg.payload, msg.qos)
-            else:
-                self._handle_system_message(msg.topic, msg.payload, msg.qos)
-        except Exception as e:
-            self.logger.error(f"处理MQTT消息失败: {e}")
+            self._inbox.put_nowait((msg.topic, msg.payload, msg.qos, time.time()))
+        except queue.Full:
+            # 多个分片网络线程并发回调，计数需加锁
+            with self._stats_lock:
+                self.stats.messages_dropped += 1
+
+    def _dispatch_loop(self):
+        """分发线程：从收件箱取消息，完成统计、主题分类并分发到各处理路径"""
+        inbox = self._inbox
+        stats = self.stats
+        match_topic = TopicRouter.match_topic
+        while True:
+            item = inbox.get()
+            if item is _INBOX_STOP:
+                return
+            topic, payload, qos, now = item
+            try:
+                stats.messages_received += 1
+                stats.last_message_time = now
+                stats.bytes_received += len(payload)
+                # 单次正则匹配完成分类，网关消息直接复用匹配结果
+                topic_type, _, format_hint, topic_info = match_topic(topic)
+                if topic_type == "device_telemetry":
+                    self._handle_device_message(topic, payload, qos, now)
+                elif topic_type == "gateway":
+                    self._handle_gateway_message(topic_info, format_hint, payload, now)
+                else:
+                    self._handle_system_message(topic, payload, qos, now)
+            except Exception as e:
+                self.logger.error(f"处理MQTT消息失败: {e}")
 
-    def _handle_device_message(self, topic: str, payload: bytes, qos: int):
+    def _handle_device_message(self, topic: str, payload: bytes, qos: int, now: float):
         """处理设备遥测消息"""
-        task_id = f"mqtt_{self.stats['messages_received']}_{int(time.time()*1000)}"
+        has_subscribers = self.data_bus.has_subscribers
+        if not any(has_subscribers(channel) for channel in _PARSED_OUTPUT_CHANNELS):
+            self.stats.messages_skipped += 1  # 仅分发线程写入
+            return
+
+        # 攒批后整批提交解析：摊薄进程池提交、结果回传与跨线程信号的逐条开销
+        item = (next(self._task_seq), topic, payload, qos, now)
+        with self._pending_parse_lock:  # 分发线程追加，主线程定时器取走
+            first = not self._pending_parse
+            self._pending_parse.append(item)
+            # 断开后不再启动刷新定时器，零散消息直接提交
+            if len(self._pending_parse) < PARSE_BATCH_SIZE and self.connected:
+                batch = None
+            else:
+                batch = self._pending_parse
+                self._pending_parse = []
+                seq = next(self._batch_seq)
+        if batch is None:
+            if first:
+                # QTimer 只能在所属线程启动，排队到主线程
+                self._parse_flush_requested.emit()
+            return
+        self._submit_parse_batch(seq, batch)
+
+    @Slot()
+    def _start_parse_flush_timer(self):
+        """主线程：启动单次刷新定时器（已在计时则沿用，不推迟提交）"""
+        if self.connected and not self.parse_flush_timer.isActive():
+            self.parse_flush_timer.start()
+
+    def _flush_parse_batch(self):
+        """主线程定时器：提交未满批的待解析消息"""
+        with self._pending_parse_lock:
+            if not self._pending_parse:
+                return
+            batch = self._pending_parse
+            self._pending_parse = []
+            seq = next(self._batch_seq)
+        self._submit_parse_batch(seq, batch)
+
+    def _submit_parse_batch(self, seq: int, batch: List[tuple]):
+        """提交一批设备消息解析：batch 为 [(任务序号, topic, payload, qos, now), ...]"""
+        parse_pool = self._get_parse_pool()
+        if parse_pool is not None:
+            try:
+                messages = [item[1:] for item in batch]
+                future = parse_pool.submit(parse_device_batch, messages)
+                future.add_done_callback(partial(self._on_parse_done, seq, batch))
+                return
+            except Exception as e:
+                # 进程池不可用（如子进程异常退出）时回退到线程池
+                self.logger.error(f"提交解析进程池失败，回退线程池: {e}")
+                self._shutdown_parse_pool()
 
-        self.thread_pool.submit(
+        task_id = self.thread_pool.submit(
             TaskType.MQTT_PROCESSING,
-            self._parse_device_message,
-            topic,
-            payload,
-            qos,
-            task_id=task_id,
+            self._parse_batch_in_thread,
+            seq,
+            batch,
+            task_id=f"mqtt_{batch[0][0]}",
             priority=TaskPriority.REALTIME,
             timeout=5.0,
         )
+        if not task_id:
+            # 提交失败也要交回该批次，否则后续批次会一直等待该序号
+            self._emit_parsed_batch(seq, batch, None, "提交解析任务失败")
 
-    def _parse_device_message(self, topic: str, payload: bytes, qos: int) -> dict:
-        """解析设备消息"""
-        parse_start_time = time.time()
-        try:
-            clean_topic, format_hint = MessageParser.parse_topic(topic)
-            device_info = TopicRouter.parse_device_topic(clean_topic)
-
-            if not device_info:
-                self.logger.debug(f"无法从主题提取设备信息: {clean_topic}")
-                return self._create_error_result(
-                    topic, payload, qos, "无法提取设备信息"
-                )
-            data, format_type = MessageParser.parse_payload(payload, format_hint)
-
-            result = self._build_telemetry_result(
-                device_info,
-                data,
-                clean_topic,
-                qos,
-                format_type,
-                len(payload),
-                parse_start_time,
-            )
-            if "device_id" not in result or not result["device_id"]:
-                self.logger.error(f"❌ CRITICAL: 结果缺少 device_id！")
-            return result
-
-        except Exception as e:
-            self.logger.error(f"解析设备消息失败 {topic}: {e}")
-            return self._create_error_result(topic, payload, qos, f"解析异常: {str(e)}")
-
-    def _build_telemetry_result(
-        self,
-        device_info: dict,
-        data: Any,
-        topic: str,
-        qos: int,
-        data_format: str,
-        data_size: int,
-        parse_start: float,
-    ) -> dict:
-        """构建遥测数据结果"""
-        if not device_info or "device_id" not in device_info:
-            self.logger.error(f"❌ device_info 无效: {device_info}")
-            return {
-                "device_id": "UNKNOWN",
-                "device_type": "ERROR",
-                "vendor": "UNKNOWN",
-                "topic": topic,
-                "timestamp": time.time(),
-                "qos": qos,
-                "parse_success": False,
-                "parse_error": "device_info 缺少 device_id",
-                "data_size": data_size,
-            }
-        # 基础结果
-        result = {
-            "device_id": device_info["device_id"],
-            "device_type": device_info["device_type"],
-            "vendor": device_info["vendor"],
-            "topic": topic,
-            "timestamp": time.time(),
-            "qos": qos,
-            "parse_success": True,
-            "parse_time": (time.time() - parse_start) * 1000,
-            "data_format": data_format,
-            "data_size": data_size,
-        }
-
-        # 验证数据格式
-        if not isinstance(data, list):
-            result.update(
-                {
-                    "parse_success": False,
-                    "parse_error": f"期望数组格式，实际: {type(data).__name__}",
-                }
-            )
-            return result
-
-        if not data:
-            result.update({"parse_success": False, "parse_error": "空数据数组"})
-            return result
-
-        # 批次信息
-        batch_size = len(data)
-        result["batch_size"] = batch_size
-
-        # 处理第一条记录
-        first_record = data[0]
-        if isinstance(first_record, dict):
-            # 字段映射
-            mapped_fields = self._map_fields(first_record)
-            result.update(mapped_fields)
-            result["sample_record"] = mapped_fields
-
-            # 时间跨度分析（仅多条记录）
-            if batch_size > 1:
-                time_info = self._analyze_batch_timespan(data)
-                result.update(time_info)
-
-        return result
-
-    def _map_fields(self, raw_data: dict) -> dict:
-        """字段映射 - 保持原有映射逻辑"""
-        mapped_data = {}
-
-        # 字段映射表
-        field_map = {
-            "eq": "equipment_id",
-            "ch": "channel",
-            "rt": "recipe",
-            "st": "step",
-            "lot": "lot_number",
-            "wf": "wafer_id",
-            "p": "pressure",
-            "t": "temperature",
-            "rf": "rf_power",
-            "ep": "endpoint",
-            "ts": "device_timestamp",
-        }
-
-        # 应用字段映射
-        for old_key, new_key in field_map.items():
-            if old_key in raw_data:
-                mapped_data[new_key] = raw_data[old_key]
-
-        # 处理嵌套的气体数据
-        if "g" in raw_data and isinstance(raw_data["g"], dict):
-            gas_data = raw_data["g"]
-            for gas_name, flow_rate in gas_data.items():
-                mapped_data[f"gas_{gas_name}"] = flow_rate
-
-        # 处理时间戳转换
-        if "device_timestamp" in mapped_data:
-            ts = mapped_data["device_timestamp"]
-            if isinstance(ts, (int, float)) and ts > 1e12:  # 微秒级
-                mapped_data["device_timestamp_sec"] = ts / 1000000
-
-        # 数值类型转换
-        numeric_fields = ["pressure", "temperature", "rf_power", "endpoint", "channel"]
-        for field in numeric_fields:
-            if field in mapped_data:
-                try:
-                    mapped_data[field] = float(mapped_data[field])
-                except (ValueError, TypeError):
-                    pass
-
-        return mapped_data
-
-    def _analyze_batch_timespan(self, batch_data: list) -> dict:
-        """分析批次时间跨度"""
+    def _parse_batch_in_thread(self, seq: int, batch: List[tuple]):
+        """线程池（进程池不可用时）：解析一批设备消息，结果连同批次序号交回主线程"""
+        results, error = None, None
         try:
-            timestamps = []
-            for record in batch_data:
-                if isinstance(record, dict) and "ts" in record:
-                    ts = record["ts"]
-                    if isinstance(ts, (int, float)):
-                        # 转换微秒时间戳
-                        if ts > 1e12:
-                            ts = ts / 1000000
-                        timestamps.append(ts)
-
-            if len(timestamps) > 1:
-                time_span = max(timestamps) - min(timestamps)
-                data_density = (
-                    len(timestamps) / time_span if time_span > 0 else float("inf")
-                )
-
-                return {
-                    "batch_time_span": time_span,
-                    "batch_data_density": data_density,
-                    "batch_start_time": min(timestamps),
-                    "batch_end_time": max(timestamps),
-                    "batch_has_timespan": True,
-                }
-            elif len(timestamps) == 1:
-                return {
-                    "batch_time_span": 0,
-                    "batch_data_density": float("inf"),
-                    "batch_start_time": timestamps[0],
-                    "batch_end_time": timestamps[0],
-                    "batch_has_timespan": False,
-                }
+            results = parse_device_batch([item[1:] for item in batch])
         except Exception as e:
-            self.logger.debug(f"时间跨度分析失败: {e}")
-
-        return {
-            "batch_time_span": None,
-            "batch_data_density": None,
-            "batch_has_timespan": False,
-        }
-
-    def _create_error_result(
-        self, topic: str, payload: bytes, qos: int, error_msg: str
-    ) -> dict:
-        """创建错误结果 - 确保包含所有必要字段"""
-        # 尝试从主题提取设备信息
-        clean_topic, _ = MessageParser.parse_topic(topic)
-        device_info = TopicRouter.parse_device_topic(clean_topic)
-
-        # 🔥 确保始终有 device_id
-        if device_info and "device_id" in device_info:
-            device_id = device_info["device_id"]
-            device_type = device_info.get("device_type", "UNKNOWN")
-            vendor = device_info.get("vendor", "UNKNOWN")
-        else:
-            # 从主题中提取尽可能多的信息
-            parts = clean_topic.split("/")
-            if len(parts) >= 4:
-                device_id = parts[3]  # factory/telemetry/type/id
-                device_type = parts[2]
-                vendor = device_id.split("_")[0] if "_" in device_id else "UNKNOWN"
-            else:
-                device_id = "ERROR_UNKNOWN"
-                device_type = "ERROR"
-                vendor = "UNKNOWN"
+            error = e
+        finally:
+            self._emit_parsed_batch(seq, batch, results, error)
+
+    def _emit_parsed_batch(
+        self, seq: int, batch: List[tuple], results: Optional[list], error: Any
+    ):
+        """将整批解析结果经一次信号交给主线程（解析失败时逐条生成错误结果）"""
+        if results is None:
+            self.logger.error(f"批量解析设备消息失败 ({len(batch)}条): {error}")
+            results = [
+                create_error_result(topic, payload, qos, f"解析异常: {error}", now)
+                for _, topic, payload, qos, now in batch
+            ]
+        self._device_batch_parsed.emit(
+            seq, [(item[0], result) for item, result in zip(batch, results)]
+        )
 
-        return {
-            "device_id": device_id,  # ✅ 始终存在
-            "device_type": device_type,
-            "vendor": vendor,
-            "topic": topic,
-            "timestamp": time.time(),
-            "qos": qos,
-            "parse_success": False,
-            "parse_error": error_msg,
-            "data_size": len(payload),
-            "raw_payload_preview": (
-                payload[:100].hex() if len(payload) > 100 else payload.hex()
-            ),
-        }
+    def _get_parse_pool(self) -> Optional[ProcessPoolExecutor]:
+        """获取解析进程池（延迟创建，创建失败时返回 None 使用线程池）"""
+        if self._parse_pool is None:
+            with self._parse_pool_lock:  # 分发线程与主线程可能同时首次使用
+                if self._parse_pool is None:
+                    try:
+                        # 进程池由分发线程首次创建：fork 会复制持有中的锁与 Qt/paho 线程状态，
+                        # 子进程统一使用 spawn 启动（main.py 顶层不导入 Qt，子进程只加载解析模块）；
+                        # 留出一个核心给 GUI 与分发线程
+                        self._parse_pool = ProcessPoolExecutor(
+                            max_workers=max(1, (os.cpu_count() or 2) - 1),
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    except Exception as e:
+                        self.logger.error(f"创建解析进程池失败: {e}")
+                        return None
+        return self._parse_pool
+
+    def _shutdown_parse_pool(self):
+        """关闭解析进程池，丢弃尚未开始的解析任务"""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+
+    def _on_parse_done(self, seq: int, batch: List[tuple], future: Future):
+        """进程池回调线程：取回整批解析结果，经一次信号交给主线程发布"""
+        if future.cancelled():
+            # 断开时取消的批次直接丢弃，仍需交回序号以推进发布顺序
+            self._device_batch_parsed.emit(seq, [])
+            return
+        error = future.exception()
+        results = future.result() if error is None else None
+        self._emit_parsed_batch(seq, batch, results, error)
 
     def _on_publish(self, client, userdata, mid):
         """发布回调"""
-        self.logger.debug(f"消息发布成功: {mid}")
+        self.logger.debug("消息发布成功: %s", mid)
 
     def _on_subscribe(self, client, userdata, mid, granted_qos):
         """订阅回调"""
-        self.logger.debug(f"订阅成功: {mid}, QoS: {granted_qos}")
+        self.logger.debug("订阅成功: %s, QoS: %s", mid, granted_qos)
+
+    @Slot()
+    def _update_reconnect_timer(self):
+        """主线程：有分片未连接时启动重连定时器（只重连断开的分片），全部就绪后停止"""
+        if self._reconnect_enabled and len(self._connected_clients) < len(self.clients):
+            if (
+                not self.reconnect_timer.isActive()
+                and self.reconnect_attempts < self.max_reconnect_attempts
+            ):
+                self.reconnect_timer.start(self.reconnect_interval)
+            return
+        self.reconnect_timer.stop()
+        if self.clients and len(self._connected_clients) == len(self.clients):
+            self.reconnect_attempts = 0
 
     def _attempt_reconnect(self):
-        """尝试重连"""
-        if not self.connected and self.client:
+        """尝试重连未连接的分片"""
+        if self.clients and len(self._connected_clients) < len(self.clients):
             self.reconnect_attempts += 1
             if self.reconnect_attempts <= self.max_reconnect_attempts:
                 try:
@@ -638,7 +724,12 @@ class MqttManager(QObject):
                     self.connection_status.emit(
                         f"重连中... ({self.reconnect_attempts}/{self.max_reconnect_attempts})"
                     )
-                    self.client.reconnect()
+                    for index, client in enumerate(self.clients):
+                        if index not in self._connected_clients:
+                            try:
+                                client.reconnect()
+                            except Exception as e:
+                                self.logger.debug(f"客户端{index}重连失败: {e}")
                 except Exception as e:
                     self.logger.debug(f"重连失败: {e}")
             else:
@@ -646,6 +737,26 @@ class MqttManager(QObject):
                 self.reconnect_timer.stop()
                 self.connection_status.emit("重连失败")
 
+    @Slot(bool, str)
+    def _on_connection_changed(self, connected: bool, message: str):
+        """主线程：按连接状态启停统计与各批次刷新定时器（断开时先刷出已攒批数据）"""
+        timers = (
+            self.stats_timer,
+            self.pub_flush_timer,
+            self.err_flush_timer,
+        )
+        if connected:
+            # 解析刷新定时器为单次定时器，由首条待解析消息按需启动
+            for timer in timers:
+                timer.start()
+            return
+        self.parse_flush_timer.stop()
+        for timer in timers:
+            timer.stop()
+        self._flush_parse_batch()
+        self._flush_pub_batch()
+        self._flush_error_batch()
+
     def _emit_statistics(self):
         """定期发送统计信息"""
         if self.connected:
@@ -656,12 +767,14 @@ class MqttManager(QObject):
         """获取统计信息"""
         current_time = time.time()
         connection_duration = 0
-        if self.stats["connection_time"] and self.connected:
-            connection_duration = current_time - self.stats["connection_time"]
+        if self.stats.connection_time and self.connected:
+            connection_duration = current_time - self.stats.connection_time
 
         return {
-            **self.stats,
+            **asdict(self.stats),
             "connected": self.connected,
+            "client_count": len(self.clients),
+            "connected_clients": len(self._connected_clients),
             "subscriptions_count": len(self.subscriptions),
             "subscribed_topics": list(self.subscriptions.keys()),
             "connection_duration": connection_duration,
@@ -677,7 +790,16 @@ class MqttManager(QObject):
             old_config = self.connection_config.copy()
 
             # 更新连接配置
-            for key in ["host", "port", "username", "password", "keepalive"]:
+            for key in [
+                "host",
+                "port",
+                "username",
+                "password",
+                "keepalive",
+                "shard_device_types",
+                "shared_subscription",
+                "share_group",
+            ]:
                 if key in config_dict:
                     self.connection_config[key] = config_dict[key]
 
@@ -700,96 +822,185 @@ class MqttManager(QObject):
             self.logger.error(f"更新MQTT配置失败: {e}")
             return False
 
-    def _on_device_data_processed(self, task_id: str, result: Any):
-        """主线程：设备数据处理完成-发布到数据总线data_bus"""
-        try:
-            task_type = result.get("task_type")
-            if task_type != TaskType.MQTT_PROCESSING.value:
-                return
-            result = result.get("data")
-            device_id = result.get("device_id")
-            if not device_id:
-                self.logger.warning(f"任务 {task_id} 缺少 device_id")
-                return
-
-            if device_id not in self.known_devices:
-                self.known_devices.add(device_id)
-                device_info = {
-                    "device_id": device_id,
-                    "device_type": result.get("device_type", "UNKNOWN"),
-                    "vendor": result.get("vendor", "UNKNOWN"),
-                    "event": "online",
-                    "timestamp": time.time(),
-                    "topic": result.get("topic", ""),
-                }
-                self.data_bus.publish(
-                    channel=DataChannel.DEVICE_EVENTS,
-                    source="mqtt_client",
-                    data=device_info,
-                    device_id=device_id,
-                )
-                self.logger.info(f"新设备上线: {device_id}")
+    @Slot(int, object)
+    def _on_device_batch_parsed(self, seq: int, items: List[tuple]):
+        """主线程：按提交顺序发布各批解析结果（先完成的批次暂存，等待前序批次）"""
+        pending = self._batch_pending
+        pending[seq] = items
+        while self._batch_next in pending:
+            items = pending.pop(self._batch_next)
+            self._batch_next += 1
+            self._publish_device_batch(items)
 
-            # 数据处理
-            parse_success = result.get("parse_success", True)
-
-            if parse_success:
-                # 发布到数据总线
-
-                success = self.data_bus.publish(
-                    channel=DataChannel.TELEMETRY_DATA,
-                    source="mqtt_client",
-                    data=result,
-                    device_id=device_id,
-                )
-                if not success:
-                    self.logger.error(f"❌ DataBus发布失败: {device_id}")
+    @staticmethod
+    def _task_name(task_id: int) -> str:
+        """任务名（消息的任务序号）"""
+        return f"mqtt_{task_id}"
+
+    def _publish_device_batch(self, items: List[tuple]):
+        """主线程：将一批设备解析结果 [(任务序号/ID, 结果), ...] 发布到数据总线data_bus"""
+        # 逐条循环中反复使用的属性与方法预先绑定为局部变量
+        known_devices = self.known_devices
+        pub_batch = self._pub_batch
+        for task_id, result in items:
+            try:
+                # 解析结果始终包含 device_id / parse_success（见 telemetry_parser）
+                device_id = result["device_id"]
+                if not device_id:
+                    self.logger.warning(
+                        f"任务 {self._task_name(task_id)} 缺少 device_id"
+                    )
+                    continue
+
+                # 稳态下绝大多数消息只需一次集合成员判断
+                if device_id not in known_devices:
+                    known_devices.add(device_id)
+                    self._invalidate_discovered_devices()
+                    self._publish_new_device(result)
+
+                if result["parse_success"]:
+                    # 加入发布批次（按到达顺序，同一设备的消息保持先后顺序）
+                    pub_batch.append((result, device_id))
+                    if len(pub_batch) >= PUB_BATCH_SIZE:
+                        self._flush_pub_batch()
+                        pub_batch = self._pub_batch  # 发布后批次列表已替换
+                else:
+                    error_data = {
+                        "device_id": device_id,
+                        "error": result.get("parse_error", "未知错误"),
+                        "task_id": self._task_name(task_id),
+                    }
+                    if self._should_report(f"parse:{error_data['error'][:50]}"):
+                        self.logger.error(
+                            "❌ 设备数据解析失败: %s -> %s",
+                            device_id,
+                            error_data["error"],
+                        )
+                    self._queue_error(error_data, device_id)
 
-            else:
-                error_data = {
-                    "device_id": device_id,
-                    "error": result.get("parse_error", "未知错误"),
-                    "task_id": task_id,
-                }
+            except Exception as e:
                 self.logger.error(
-                    f"❌ 设备数据解析失败: {device_id} -> {result.get("parse_error", "未知错误")}"
-                )
-                self.data_bus.publish(
-                    channel=DataChannel.ERRORS,
-                    source="mqtt_client",
-                    data=error_data,
-                    device_id=device_id,
+                    f"处理任务回调失败: {self._task_name(task_id)} -> {e}"
                 )
 
-        except Exception as e:
-            self.logger.error(f"处理任务回调失败: {task_id} -> {e}")
+        # 断开后仍在途的解析结果：刷新定时器已停止，直接发布
+        if not self.pub_flush_timer.isActive():
+            self._flush_pub_batch()
 
-    def _handle_gateway_message(self, topic: str, payload: bytes, qos: int):
-        """简化的网关消息处理"""
-        try:
-            clean_topic, format_hint = MessageParser.parse_topic(topic)
-            gateway_info = TopicRouter.parse_gateway_topic(clean_topic)
+    def _publish_new_device(self, result: dict):
+        """主线程：首次出现的设备发布上线事件"""
+        device_id = result["device_id"]
+        self.data_bus.publish(
+            channel=DataChannel.DEVICE_EVENTS,
+            source="mqtt_client",
+            data={
+                "device_id": device_id,
+                "device_type": result.get("device_type", "UNKNOWN"),
+                "vendor": result.get("vendor", "UNKNOWN"),
+                "event": "online",
+                "timestamp": result.get("timestamp") or time.time(),
+                "topic": result.get("topic", ""),
+            },
+            device_id=device_id,
+        )
+        self.logger.info(f"新设备上线: {device_id}")
+
+    def _queue_error(self, error_data: dict, device_id: Optional[str] = None):
+        """主线程：错误事件加入批次，满批立即发布"""
+        self._err_batch.append((error_data, device_id))
+        if (
+            len(self._err_batch) >= ERROR_BATCH_SIZE
+            or not self.err_flush_timer.isActive()
+        ):
+            self._flush_error_batch()
+
+    def _flush_error_batch(self):
+        """主线程：将攒批的错误事件整批发布到 ERRORS 频道"""
+        if not self._err_batch:
+            return
+        batch = self._err_batch
+        self._err_batch = []
+        self.data_bus.publish_many(
+            channel=DataChannel.ERRORS, source="mqtt_client", items=batch
+        )
 
-            if not gateway_info:
-                return
+    def _flush_pub_batch(self):
+        """主线程：将攒批的遥测数据整批发布到数据总线"""
+        if not self._pub_batch:
+            return
+        batch = self._pub_batch
+        self._pub_batch = []
+        success = self.data_bus.publish_many(
+            channel=DataChannel.TELEMETRY_DATA,
+            source="mqtt_client",
+            items=batch,
+        )
+        if not success:
+            self.logger.error(f"❌ DataBus批量发布失败: {len(batch)}条")
+
+    def _handle_gateway_message(
+        self, gateway_info: dict, format_hint: str, payload: bytes, now: float
+    ):
+        """网关消息处理：载荷解码交给线程池，分发线程不被突发的网关消息阻塞"""
+        seq = next(self._gateway_seq)
+        task_id = self.thread_pool.submit(
+            TaskType.MQTT_PROCESSING,
+            self._decode_gateway_event,
+            seq,
+            gateway_info,
+            format_hint,
+            payload,
+            now,
+            task_id=f"mqtt_gw_{seq}",
+            priority=TaskPriority.NORMAL,
+            timeout=5.0,
+        )
+        if not task_id:
+            # 提交失败也要占位，否则后续网关事件会一直等待该序号
+            self._gateway_event_decoded.emit(seq, None)
 
+    def _decode_gateway_event(
+        self,
+        seq: int,
+        gateway_info: dict,
+        format_hint: str,
+        payload: bytes,
+        now: float,
+    ):
+        """线程池：解码网关载荷（gateway_info / format_hint 来自 TopicRouter.match_topic），
+        结果连同序号交回主线程发布"""
+        event = None
+        try:
             data, actual_format = MessageParser.parse_payload(payload, format_hint)
-
-            self.data_bus.publish(
-                channel=DataChannel.DEVICE_EVENTS,
-                source="mqtt_client",
-                data={
-                    **gateway_info,
-                    "data": data,
-                    "format": actual_format,
-                    "timestamp": time.time(),
-                },
-                device_id=gateway_info["device_id"],
-            )
-        except Exception as e:
+            event = {
+                **gateway_info,
+                "data": data,
+                "format": actual_format,
+                "timestamp": now,
+            }
+        except ValueError as e:
             self.logger.error(f"❌ 处理网关消息失败: {e}")
+        finally:
+            self._gateway_event_decoded.emit(seq, event)
+
+    @Slot(int, object)
+    def _publish_gateway_event(self, seq: int, event: Optional[dict]):
+        """主线程：按到达顺序发布网关设备事件（解码失败的序号只推进顺序）"""
+        pending = self._gateway_pending
+        pending[seq] = event
+        while self._gateway_next in pending:
+            event = pending.pop(self._gateway_next)
+            self._gateway_next += 1
+            if event is not None:
+                # data_bus.publish 内部已捕获并统计异常
+                self.data_bus.publish(
+                    channel=DataChannel.DEVICE_EVENTS,
+                    source="mqtt_client",
+                    data=event,
+                    device_id=event["device_id"],
+                )
 
-    def _handle_system_message(self, topic: str, payload: bytes, qos: int):
+    def _handle_system_message(self, topic: str, payload: bytes, qos: int, now: float):
         """简化的系统消息处理"""
         self.data_bus.publish(
             channel=DataChannel.DEVICE_EVENTS,
@@ -798,7 +1009,7 @@ class MqttManager(QObject):
                 "event_type": "system_message",
                 "topic": topic,
                 "payload_size": len(payload),
-                "timestamp": time.time(),
+                "timestamp": now,
             },
         )
 
@@ -806,38 +1017,52 @@ class MqttManager(QObject):
     def _on_device_data_processing_failed(self, task_id: str, error_info: dict):
         """处理MQTT任务失败"""
         try:
-            if error_info.get("task_type") != TaskType.MQTT_PROCESSING.value:
+            if error_info.get("task_type") != _MQTT_TASK_TYPE:
                 return  # 静默忽略非MQTT任务
 
             # 提取错误信息
             error_msg = error_info.get("error", "未知错误")
             error_detail = error_info.get("message", error_msg)
 
-            self.logger.error(f"❌ MQTT任务失败 {task_id}: {error_detail}")
+            if self._should_report(f"task:{str(error_detail)[:50]}"):
+                self.logger.error("❌ MQTT任务失败 %s: %s", task_id, error_detail)
 
             # 发布错误事件
-            self.data_bus.publish(
-                channel=DataChannel.ERRORS,
-                source="mqtt_client",
-                data={
+            self._queue_error(
+                {
                     "error": error_msg,
                     "error_detail": error_detail,
                     "task_id": task_id,
                     "error_type": "mqtt_processing_failure",
                     "timestamp": time.time(),
-                },
+                }
             )
 
         except Exception as e:
             self.logger.error(f"❌ 处理失败回调异常: {task_id} -> {e}", exc_info=True)
 
-    def get_discovered_devices(self) -> Dict[str, dict]:
-        """获取已发现的设备信息"""
-        return {device_id: {"device_id": device_id} for device_id in self.known_devices}
+    def _invalidate_discovered_devices(self):
+        self._devices_snapshot = None
+
+    def get_discovered_devices(self) -> Mapping[str, dict]:
+        """获取已发现的设备信息（只读快照，设备集合未变化时复用）"""
+        if self._devices_snapshot is None:
+            self._devices_snapshot = MappingProxyType(
+                {
+                    device_id: {"device_id": device_id}
+                    for device_id in self.known_devices
+                }
+            )
+        return self._devices_snapshot
+
+    @property
+    def connected(self) -> bool:
+        """任一分片客户端已连接（兼容原布尔属性）"""
+        return self._connected_evt.is_set()
 
     def is_connected(self) -> bool:
         """检查MQTT连接状态"""
-        return self.connected
+        return self._connected_evt.is_set()
 
 
 _mqtt_manager = None
@@ -3,9 +3,23 @@ import logging
 import json
 import time
 import threading
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from collections import defaultdict, deque
 
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退到标准库 json
+    orjson = None
+
+
+def _dumps(obj: Any) -> Union[bytes, str]:
+    """序列化缓冲负载：优先使用 orjson（C 实现，直接输出 UTF-8 字节）"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(obj, ensure_ascii=False)
+
 
 class RedisManager:
     """Redis连接和操作管理器"""
@@ -153,6 +167,11 @@ class RedisDataBuffer:
         self._batch_locks = defaultdict(lambda: threading.Lock())
         self._last_flush_time = defaultdict(lambda: time.time())
 
+        # 🔥 写入计数（工作线程更新，统计接口直接读取）
+        self._counter_lock = threading.Lock()
+        self._written_messages = 0
+        self._failed_messages = 0
+
     @property
     def buffer_strategies(self):
         """延迟初始化缓冲策略"""
@@ -212,7 +231,7 @@ class RedisDataBuffer:
         try:
             strategy = self.buffer_strategies.get(message.channel)
             if not strategy:
-                self.logger.debug(f"频道 {message.channel.value} 未配置缓冲策略")
+                self.logger.debug("频道 %s 未配置缓冲策略", message.channel.value)
                 return True
 
             # 🔥 支持批量缓冲（在线程池中调用时推荐）
@@ -253,29 +272,111 @@ class RedisDataBuffer:
             self.logger.error(f"批量缓冲失败: {e}")
             return False
 
-    def _single_buffer_message(
-        self, client: redis.Redis, message, strategy: dict
-    ) -> bool:
-        """单条消息缓冲 - 立即写入"""
+    def buffer_messages(self, messages) -> int:
+        """批量写入一组消息：所有频道共用一个非事务 Pipeline，一次往返
+
+        返回实际写入的消息数
+        """
+        client = self.redis_manager.get_client()
+        if not client:
+            with self._counter_lock:
+                self._failed_messages += len(messages)
+            self.logger.debug("Redis未连接，跳过缓冲")
+            return 0
+
         try:
-            # 准备消息数据
-            message_data = {
+            pipe = client.pipeline(transaction=False)
+            list_strategies = {}
+            queued = 0
+
+            for message in messages:
+                strategy = self.buffer_strategies.get(message.channel)
+                if not strategy:
+                    continue
+
+                if strategy["redis_type"] == "stream":
+                    pipe.xadd(
+                        strategy["key"],
+                        self._message_payload(message),
+                        maxlen=strategy["max_length"],
+                        approximate=True,
+                    )
+                elif strategy["redis_type"] == "list":
+                    pipe.lpush(strategy["key"], self._list_entry(message))
+                    list_strategies[strategy["key"]] = strategy
+                queued += 1
+
+            # 每个 list 只裁剪/续期一次
+            for key, strategy in list_strategies.items():
+                pipe.ltrim(key, 0, strategy["max_length"] - 1)
+                if strategy.get("ttl"):
+                    pipe.expire(key, strategy["ttl"])
+
+            if queued:
+                pipe.execute()
+            with self._counter_lock:
+                self._written_messages += queued
+            return queued
+
+        except Exception as e:
+            with self._counter_lock:
+                self._failed_messages += len(messages)
+            self.logger.error(f"批量写入失败: {e}")
+            return 0
+
+    def get_write_counters(self) -> tuple:
+        """返回 (已写入消息数, 写入失败消息数)"""
+        with self._counter_lock:
+            return self._written_messages, self._failed_messages
+
+    @staticmethod
+    def _message_payload(message) -> dict:
+        """构造写入Redis Stream的消息字段（各字段值须为 str / bytes / 数值）"""
+        return {
+            "channel": message.channel.value,
+            "source": message.source,
+            # 已是 str / bytes 的负载原样写入（redis 接受两者），不再二次序列化
+            "data": (
+                message.data
+                if isinstance(message.data, (str, bytes))
+                else _dumps(message.data)
+            ),
+            "timestamp": message.timestamp,
+            "device_id": message.device_id or "",
+        }
+
+    @staticmethod
+    def _list_entry(message) -> Union[bytes, str]:
+        """构造写入Redis List的条目：整个信封只序列化一次，data 以原始对象内嵌
+
+        （_dumps 在 orjson 下返回 bytes，不能再嵌套进外层信封二次序列化；
+        bytes 负载同理无法直接内嵌，按 UTF-8 解码为文本，无效字节以替换符表示）
+        """
+        data = message.data
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", "replace")
+        return _dumps(
+            {
                 "channel": message.channel.value,
                 "source": message.source,
-                "data": (
-                    json.dumps(message.data, ensure_ascii=False)
-                    if not isinstance(message.data, str)
-                    else message.data
-                ),
+                "data": data,
                 "timestamp": message.timestamp,
                 "device_id": message.device_id or "",
             }
+        )
 
+    def _single_buffer_message(
+        self, client: redis.Redis, message, strategy: dict
+    ) -> bool:
+        """单条消息缓冲 - 立即写入"""
+        try:
             # 根据策略选择Redis数据结构
             if strategy["redis_type"] == "stream":
-                return self._buffer_to_stream(client, strategy, message_data)
+                return self._buffer_to_stream(
+                    client, strategy, self._message_payload(message)
+                )
             elif strategy["redis_type"] == "list":
-                return self._buffer_to_list(client, strategy, message_data)
+                return self._buffer_to_list(client, strategy, self._list_entry(message))
 
         except Exception as e:
             self.logger.error(f"单条缓冲失败: {e}")
@@ -300,29 +401,15 @@ class RedisDataBuffer:
             pipe = client.pipeline()
 
             for message in messages:
-                message_data = {
-                    "channel": message.channel.value,
-                    "source": message.source,
-                    "data": (
-                        json.dumps(message.data, ensure_ascii=False)
-                        if not isinstance(message.data, str)
-                        else message.data
-                    ),
-                    "timestamp": message.timestamp,
-                    "device_id": message.device_id or "",
-                }
-
                 if strategy["redis_type"] == "stream":
                     pipe.xadd(
                         strategy["key"],
-                        message_data,
+                        self._message_payload(message),
                         maxlen=strategy["max_length"],
                         approximate=True,
                     )
                 elif strategy["redis_type"] == "list":
-                    pipe.lpush(
-                        strategy["key"], json.dumps(message_data, ensure_ascii=False)
-                    )
+                    pipe.lpush(strategy["key"], self._list_entry(message))
 
             # 限制长度（对于list类型）
             if strategy["redis_type"] == "list":
@@ -359,12 +446,12 @@ class RedisDataBuffer:
             return False
 
     def _buffer_to_list(
-        self, client: redis.Redis, strategy: dict, message_data: dict
+        self, client: redis.Redis, strategy: dict, entry: Union[bytes, str]
     ) -> bool:
-        """缓冲到Redis List"""
+        """缓冲到Redis List（entry 为 _list_entry 序列化后的条目）"""
         try:
             pipe = client.pipeline()
-            pipe.lpush(strategy["key"], json.dumps(message_data, ensure_ascii=False))
+            pipe.lpush(strategy["key"], entry)
             pipe.ltrim(strategy["key"], 0, strategy["max_length"] - 1)
 
             if strategy.get("ttl"):
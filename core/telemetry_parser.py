@@ -0,0 +1,625 @@
+import re
+import json
+import time
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+import msgpack
+import numpy as np
+
+try:
+    import msgspec
+except ImportError:  # 未安装 msgspec 时使用 msgpack / json 解析
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退到标准库 json
+    orjson = None
+
+# msgspec 解码器（C 实现，可跨线程共享）
+_MSGPACK_DECODER = msgspec.msgpack.Decoder() if msgspec is not None else None
+_JSON_DECODER = msgspec.json.Decoder() if msgspec is not None else None
+
+# 载荷解码可能抛出的异常（仅捕获这些，其余异常视为程序错误向上传播）：
+#   ValueError 覆盖 json / orjson 解码错误、UnicodeDecodeError 及 msgpack 的格式错误；
+#   TypeError 为 msgpack 以不可哈希类型作为映射键
+_DECODE_ERRORS = (ValueError, TypeError, msgpack.UnpackException) + (
+    (msgspec.DecodeError,) if msgspec is not None else ()
+)
+
+
+# 每个工作线程复用一个流式 Unpacker，省去逐条 unpackb 的解析器与缓冲区分配
+_unpacker_local = threading.local()
+_UNPACKER_RECYCLE = 10000  # 每解析N条换新实例，释放其保留的缓冲区
+
+
+def _unpack_msgpack(payload: bytes) -> Any:
+    """解析单条 MessagePack 载荷（语义同 unpackb）：优先 msgspec，否则用线程内复用的 Unpacker"""
+    if _MSGPACK_DECODER is not None:
+        return _MSGPACK_DECODER.decode(payload)
+
+    unpacker = getattr(_unpacker_local, "unpacker", None)
+    if unpacker is None or _unpacker_local.uses >= _UNPACKER_RECYCLE:
+        unpacker = msgpack.Unpacker(
+            raw=False,
+            strict_map_key=False,
+            use_list=True,
+            max_buffer_size=16 * 1024 * 1024,
+        )
+        _unpacker_local.unpacker = unpacker
+        _unpacker_local.uses = 0
+    _unpacker_local.uses += 1
+
+    start = unpacker.tell()
+    try:
+        unpacker.feed(payload)
+        data = unpacker.unpack()
+    except Exception:
+        # 残缺数据会留在缓冲区，丢弃该实例
+        _unpacker_local.unpacker = None
+        raise
+    if unpacker.tell() - start != len(payload):
+        _unpacker_local.unpacker = None
+        raise ValueError("MessagePack载荷包含多余数据")
+    return data
+
+
+def _loads_json(payload: bytes) -> Any:
+    """解析 JSON 载荷：依次优先 msgspec / orjson，均直接读取字节无需先解码为 str"""
+    if _JSON_DECODER is not None:
+        return _JSON_DECODER.decode(payload)
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+# 遥测字段映射表（设备缩写 -> 标准字段名）
+_FIELD_MAP = (
+    ("eq", "equipment_id"),
+    ("ch", "channel"),
+    ("rt", "recipe"),
+    ("st", "step"),
+    ("lot", "lot_number"),
+    ("wf", "wafer_id"),
+    ("p", "pressure"),
+    ("t", "temperature"),
+    ("rf", "rf_power"),
+    ("ep", "endpoint"),
+    ("ts", "device_timestamp"),
+)
+
+# 需要转换为 float 的标准字段
+_NUMERIC_FIELDS = frozenset(
+    {"pressure", "temperature", "rf_power", "endpoint", "channel"}
+)
+
+# 预先展开的映射规格 (缩写, 标准字段名, 是否转 float)，映射时无需逐字段查集合
+_FIELD_SPECS = tuple(
+    (old_key, new_key, new_key in _NUMERIC_FIELDS) for old_key, new_key in _FIELD_MAP
+)
+_MISSING = object()
+
+
+def _compile_field_mapper(name: str, read: str, missing: Any, convert: bool):
+    """按 _FIELD_SPECS 生成逐字段直线展开的映射函数（模块加载时编译一次）
+
+    生成的代码不再遍历规格表、不再按标志分支。read 为读取字段的表达式模板，
+    missing 为字段缺失时的哨兵；convert 为真时数值字段内联 float 转换（已是 float 时跳过）
+    """
+    lines = [f"def {name}(raw_data):", "    mapped_data = {}"]
+    for old_key, new_key, numeric in _FIELD_SPECS:
+        lines.append(f"    value = {read.format(key=old_key)}")
+        lines.append("    if value is not _MISSING:")
+        if numeric and convert:
+            # MessagePack/JSON 解码出的浮点数已是 float，跳过多余的转换与 try 块
+            lines.append("        if type(value) is not float:")
+            lines.append("            try:")
+            lines.append("                value = float(value)")
+            lines.append("            except (ValueError, TypeError):")
+            lines.append("                pass")
+        lines.append(f"        mapped_data[{new_key!r}] = value")
+    lines.append("    return mapped_data")
+
+    namespace = {"_MISSING": missing}
+    exec(compile("\n".join(lines), f"<{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+_map_standard_fields = _compile_field_mapper(
+    "_map_standard_fields", "raw_data.get({key!r}, _MISSING)", _MISSING, convert=True
+)
+
+# 定型解码：已知结构的 MessagePack 批次由 msgspec 一次解码为记录对象，
+# 数值字段在解码时即转为 float，无需再经过通用字典与逐字段转换。
+# 结构不符（字段类型不同、非数组等）时抛出 ValidationError，回退到通用解析
+if msgspec is not None:
+    _NumericField = Union[float, None, msgspec.UnsetType]
+
+    class _TelemetryRecord(msgspec.Struct):
+        """单条遥测记录（字段名为设备缩写；数值字段定型为 float，其余保持原值）"""
+
+        eq: Any = msgspec.UNSET
+        ch: _NumericField = msgspec.UNSET
+        rt: Any = msgspec.UNSET
+        st: Any = msgspec.UNSET
+        lot: Any = msgspec.UNSET
+        wf: Any = msgspec.UNSET
+        p: _NumericField = msgspec.UNSET
+        t: _NumericField = msgspec.UNSET
+        rf: _NumericField = msgspec.UNSET
+        ep: _NumericField = msgspec.UNSET
+        ts: Any = msgspec.UNSET
+        g: Any = msgspec.UNSET
+
+    _RECORDS_DECODER = msgspec.msgpack.Decoder(list[_TelemetryRecord])
+    _map_record_fields = _compile_field_mapper(
+        "_map_record_fields", "raw_data.{key}", msgspec.UNSET, convert=False
+    )
+else:
+    _TelemetryRecord = None
+    _RECORDS_DECODER = None
+
+# 自动识别格式的首字节表：JSON 值/空白的起始字符 -> JSON；
+# MessagePack fixmap / fixarray / array16/32 / map16/32 头 -> MessagePack；其余走兜底
+_SNIFF_OTHER, _SNIFF_JSON, _SNIFF_MSGPACK = 0, 1, 2
+_FORMAT_BY_FIRST_BYTE = bytearray(256)
+for _byte in b' \t\r\n{["-0123456789tfn':
+    _FORMAT_BY_FIRST_BYTE[_byte] = _SNIFF_JSON
+for _byte in (*range(0x80, 0xA0), *range(0xDC, 0xE0)):
+    _FORMAT_BY_FIRST_BYTE[_byte] = _SNIFF_MSGPACK
+del _byte
+
+# 错误结果中载荷预览的字节数（hex 编码后长度翻倍）
+PAYLOAD_PREVIEW_BYTES = 16
+
+# 常见二进制载荷签名（NUL / gzip / PNG / zip），文本探测时直接跳过 UTF-8 解码
+_BINARY_SIGNATURES = (b"\x00", b"\x1f\x8b", b"\x89PNG", b"PK\x03\x04")
+
+
+# 主题分类正则：一次扫描同时得到主题类型、设备/网关字段与格式后缀
+#   factory/telemetry/{device_type}/{device_id}[/...][/msgpack|/json]
+#   gateway/{gateway_id}/{function}[/...][/msgpack|/json]
+# 末段恰为格式后缀时不作为 device_id / function（与先去后缀再 split 的语义一致）
+TOPIC_CACHE_SIZE = 4096  # 主题解析结果缓存条数（覆盖工厂内全部设备主题）
+_TOPIC_RE = re.compile(
+    r"^(?:factory/telemetry/(?P<dtype>[^/]*)/(?P<did>(?!(?:msgpack|json)$)[^/]*)"
+    r"|gateway/(?P<gid>[^/]*)/(?P<fn>(?!(?:msgpack|json)$)[^/]*))"
+    r"(?:/[^/]*)*?(?:/(?P<fmt>msgpack|json))?$"
+)
+
+
+# 主题格式后缀 -> 载荷格式（末段查表，一次 rpartition 代替逐个 endswith）
+_FORMAT_SUFFIXES = {"msgpack": "msgpack", "json": "json"}
+
+
+class MessageParser:
+    """统一的消息解析器"""
+
+    @staticmethod
+    def parse_topic(topic: str) -> tuple[str, str]:
+        """解析主题，返回 (clean_topic, format_type)"""
+        head, sep, tail = topic.rpartition("/")
+        format_type = _FORMAT_SUFFIXES.get(tail) if sep else None
+        if format_type is None:
+            return topic, "auto"
+        return head, format_type
+
+    @staticmethod
+    def parse_payload(payload: bytes, format_hint: str = "auto") -> tuple[Any, str]:
+        """解析载荷，返回 (data, actual_format)"""
+        if format_hint == "msgpack":
+            try:
+                data = _unpack_msgpack(payload)
+                return data, "msgpack"
+            except _DECODE_ERRORS as e:
+                raise ValueError(f"MessagePack解析失败: {e}")
+
+        elif format_hint == "json":
+            try:
+                data = _loads_json(payload)
+                return data, "json"
+            except _DECODE_ERRORS as e:
+                raise ValueError(f"JSON解析失败: {e}")
+
+        else:  # auto detect
+            # 按首字节直接选择解码器，常见载荷无需靠异常试错
+            sniffed = _FORMAT_BY_FIRST_BYTE[payload[0]] if payload else _SNIFF_OTHER
+            if sniffed == _SNIFF_MSGPACK:
+                try:
+                    return _unpack_msgpack(payload), "msgpack"
+                except _DECODE_ERRORS:
+                    pass
+            elif sniffed == _SNIFF_JSON:
+                try:
+                    return _loads_json(payload), "json"
+                except _DECODE_ERRORS:
+                    pass
+
+            # 兜底：依次尝试未试过的 MessagePack / JSON
+            if sniffed != _SNIFF_MSGPACK:
+                try:
+                    data = _unpack_msgpack(payload)
+                    return data, "msgpack"
+                except _DECODE_ERRORS:
+                    pass
+
+            if sniffed != _SNIFF_JSON:
+                try:
+                    data = _loads_json(payload)
+                    return data, "json"
+                except _DECODE_ERRORS:
+                    pass
+
+            # 尝试纯文本：纯 ASCII 无需逐字节 UTF-8 校验，常见二进制签名直接判定失败
+            if payload.isascii():
+                return {"text": payload.decode("ascii")}, "text"
+            if payload.startswith(_BINARY_SIGNATURES):
+                raise ValueError("无法识别数据格式")
+            try:
+                text = payload.decode("utf-8")
+                return {"text": text}, "text"
+            except UnicodeDecodeError:
+                pass
+
+            raise ValueError("无法识别数据格式")
+
+
+class TopicRouter:
+    """主题路由器"""
+
+    @staticmethod
+    def parse_device_topic(topic: str) -> Optional[dict]:
+        """解析设备主题: factory/telemetry/{device_type}/{device_id}"""
+        parts = topic.split("/")
+        if len(parts) >= 4 and parts[0] == "factory" and parts[1] == "telemetry":
+            device_type = parts[2]
+            device_id = parts[3]
+
+            # 解析设备ID获取厂商
+            id_parts = device_id.split("_")
+            vendor = id_parts[0] if len(id_parts) > 0 else "UNKNOWN"
+            return {
+                "device_id": device_id,
+                "device_type": device_type,
+                "vendor": vendor,
+                "topic_type": "telemetry",
+            }
+
+        return None
+
+    @staticmethod
+    def parse_gateway_topic(topic: str) -> Optional[dict]:
+        """解析网关主题: gateway/{gateway_id}/{function}"""
+        parts = topic.split("/")
+        if len(parts) >= 3 and parts[0] == "gateway":
+            return {
+                "device_id": parts[1],
+                "device_type": "GATEWAY",
+                "vendor": "SYSTEM",
+                "function": parts[2],
+                "topic_type": "gateway",
+            }
+        return None
+
+    @staticmethod
+    @lru_cache(maxsize=TOPIC_CACHE_SIZE)
+    def match_topic(topic: str) -> tuple[str, str, str, Optional[dict]]:
+        """单次正则匹配分类主题，返回 (topic_type, clean_topic, format_type, info)
+
+        topic_type 为 device_telemetry / gateway / system；
+        info 为设备或网关信息（同 parse_device_topic / parse_gateway_topic），system 时为 None。
+        结果按主题缓存（设备主题集合稳定，命中后省去正则匹配与字典构建），
+        info 为多条消息共享的同一对象，调用方只读不改。
+        """
+        m = _TOPIC_RE.match(topic)
+        if m is None:
+            clean_topic, format_type = MessageParser.parse_topic(topic)
+            return "system", clean_topic, format_type, None
+
+        format_type = m["fmt"]
+        if format_type:
+            clean_topic = topic[: m.start("fmt") - 1]
+        else:
+            clean_topic, format_type = topic, "auto"
+
+        device_id = m["did"]
+        if device_id is not None:
+            return (
+                "device_telemetry",
+                clean_topic,
+                format_type,
+                {
+                    "device_id": device_id,
+                    "device_type": m["dtype"],
+                    "vendor": device_id.partition("_")[0],
+                    "topic_type": "telemetry",
+                },
+            )
+        return (
+            "gateway",
+            clean_topic,
+            format_type,
+            {
+                "device_id": m["gid"],
+                "device_type": "GATEWAY",
+                "vendor": "SYSTEM",
+                "function": m["fn"],
+                "topic_type": "gateway",
+            },
+        )
+
+    @staticmethod
+    def classify_topic(topic: str) -> str:
+        """分类主题类型"""
+        return TopicRouter.match_topic(topic)[0]
+
+
+# 逐条消息路径上的 debug 日志使用 %s 惰性格式化，级别关闭时不做字符串拼接
+logger = logging.getLogger("TelemetryParser")
+
+
+def parse_device_message(
+    topic: str, payload: bytes, qos: int, now: Optional[float] = None
+) -> dict:
+    """解析设备消息
+
+    now: 消息接收时间（由 _on_message 取一次时钟后传入），作为结果的 timestamp
+    """
+    if now is None:
+        now = time.time()
+    parse_start_ns = time.perf_counter_ns()
+    topic_type, clean_topic, format_hint, device_info = TopicRouter.match_topic(topic)
+    if topic_type != "device_telemetry":
+        logger.debug("无法从主题提取设备信息: %s", clean_topic)
+        return create_error_result(topic, payload, qos, "无法提取设备信息", now)
+
+    # 仅解码可能因载荷异常而失败（parse_payload 统一抛出 ValueError）；
+    # 其余步骤的意外异常由进程池 / 线程池的失败回调兜底
+    try:
+        data, format_type = _decode_telemetry(payload, format_hint)
+    except ValueError as e:
+        logger.error(f"解析设备消息失败 {topic}: {e}")
+        return create_error_result(topic, payload, qos, f"解析异常: {str(e)}", now)
+
+    result = build_telemetry_result(
+        device_info,
+        data,
+        clean_topic,
+        qos,
+        format_type,
+        len(payload),
+        now,
+        parse_start_ns,
+    )
+    if not result["device_id"]:
+        logger.error("❌ CRITICAL: 结果缺少 device_id！")
+    return result
+
+
+def _decode_telemetry(payload: bytes, format_hint: str) -> tuple[Any, str]:
+    """解码遥测载荷：MessagePack 优先定型解码为记录对象列表，结构不符时走通用解析"""
+    if format_hint == "msgpack" and _RECORDS_DECODER is not None:
+        try:
+            return _RECORDS_DECODER.decode(payload), "msgpack"
+        except msgspec.DecodeError:
+            pass  # 含 ValidationError；通用解析负责给出原有的数据/错误语义
+    return MessageParser.parse_payload(payload, format_hint)
+
+
+def parse_device_batch(messages: list) -> list:
+    """批量解析设备消息：messages 为 [(topic, payload, qos, now), ...]，按序返回结果
+
+    单条消息的意外异常只影响该条（转为错误结果），不拖累同批其他消息
+    """
+    results = []
+    for topic, payload, qos, now in messages:
+        try:
+            results.append(parse_device_message(topic, payload, qos, now))
+        except Exception as e:
+            logger.error(f"解析设备消息失败 {topic}: {e}")
+            results.append(
+                create_error_result(topic, payload, qos, f"解析异常: {str(e)}", now)
+            )
+    return results
+
+
+def build_telemetry_result(
+    device_info: dict,
+    data: Any,
+    topic: str,
+    qos: int,
+    data_format: str,
+    data_size: int,
+    now: float,
+    parse_start_ns: int,
+) -> dict:
+    """构建遥测数据结果（now 为消息时间戳，parse_start_ns 为 perf_counter_ns 起点）"""
+    if not device_info or "device_id" not in device_info:
+        logger.error(f"❌ device_info 无效: {device_info}")
+        return {
+            "device_id": "UNKNOWN",
+            "device_type": "ERROR",
+            "vendor": "UNKNOWN",
+            "topic": topic,
+            "timestamp": now,
+            "qos": qos,
+            "parse_success": False,
+            "parse_error": "device_info 缺少 device_id",
+            "data_size": data_size,
+        }
+    # 基础结果
+    result = {
+        "device_id": device_info["device_id"],
+        "device_type": device_info["device_type"],
+        "vendor": device_info["vendor"],
+        "topic": topic,
+        "timestamp": now,
+        "qos": qos,
+        "parse_success": True,
+        "parse_time": (time.perf_counter_ns() - parse_start_ns) / 1e6,
+        "data_format": data_format,
+        "data_size": data_size,
+    }
+
+    # 验证数据格式
+    # 错误路径直接原地改写，不构造临时字典
+    if not isinstance(data, list):
+        result["parse_success"] = False
+        result["parse_error"] = f"期望数组格式，实际: {type(data).__name__}"
+        return result
+
+    if not data:
+        result["parse_success"] = False
+        result["parse_error"] = "空数据数组"
+        return result
+
+    # 批次信息
+    batch_size = len(data)
+    result["batch_size"] = batch_size
+
+    # 处理第一条记录
+    first_record = data[0]
+    if isinstance(first_record, dict):
+        # 字段映射：仅保存在 sample_record 中（持久化、可视化与 Redis 缓冲均从此读取），
+        # 不再展开到顶层，避免同一组字段在序列化时出现两份
+        result["sample_record"] = map_fields(first_record)
+
+        # 时间跨度分析（仅多条记录）
+        if batch_size > 1:
+            analyze_batch_timespan(data, out=result)
+    elif type(first_record) is _TelemetryRecord:
+        result["sample_record"] = map_record_fields(first_record)
+        if batch_size > 1:
+            analyze_timestamps(
+                (record.ts for record in data if isinstance(record.ts, (int, float))),
+                out=result,
+            )
+
+    return result
+
+
+def map_fields(raw_data: dict) -> dict:
+    """字段映射 - 保持原有映射逻辑（标准字段由预编译的展开函数一次完成）"""
+    # 应用字段映射
+    return _map_extra_fields(_map_standard_fields(raw_data), raw_data.get("g"))
+
+
+def map_record_fields(record: Any) -> dict:
+    """定型记录的字段映射，输出与 map_fields 对同一记录的结果一致"""
+    return _map_extra_fields(_map_record_fields(record), record.g)
+
+
+def _map_extra_fields(mapped_data: dict, gas_data: Any) -> dict:
+    """补充气体流量字段与秒级设备时间戳"""
+    # 处理嵌套的气体数据
+    if isinstance(gas_data, dict):
+        for gas_name, flow_rate in gas_data.items():
+            mapped_data[f"gas_{gas_name}"] = flow_rate
+
+    # 处理时间戳转换
+    ts = mapped_data.get("device_timestamp")
+    if isinstance(ts, (int, float)) and ts > 1e12:  # 微秒级
+        mapped_data["device_timestamp_sec"] = ts / 1000000
+
+    return mapped_data
+
+
+def analyze_batch_timespan(batch_data: list, out: Optional[dict] = None) -> dict:
+    """分析批次时间跨度
+
+    out: 直接写入的目标字典（如遥测结果），省去中间字典的分配与 update 合并；
+    为 None 时写入新字典。返回写入的字典。
+    """
+    return analyze_timestamps(
+        (
+            record["ts"]
+            for record in batch_data
+            if isinstance(record, dict) and isinstance(record.get("ts"), (int, float))
+        ),
+        out=out,
+    )
+
+
+def analyze_timestamps(timestamps: Any, out: Optional[dict] = None) -> dict:
+    """按批次内各记录的数值时间戳（可迭代对象）计算时间跨度，写入 out 并返回"""
+    if out is None:
+        out = {}
+    try:
+        timestamps = np.fromiter(timestamps, dtype=np.float64)
+        # 转换微秒时间戳
+        micros = timestamps > 1e12
+        timestamps[micros] /= 1000000
+
+        if timestamps.size > 1:
+            start_time = float(timestamps.min())
+            end_time = float(timestamps.max())
+            time_span = end_time - start_time
+            out["batch_time_span"] = time_span
+            out["batch_data_density"] = (
+                timestamps.size / time_span if time_span > 0 else float("inf")
+            )
+            out["batch_start_time"] = start_time
+            out["batch_end_time"] = end_time
+            out["batch_has_timespan"] = True
+            return out
+        elif timestamps.size == 1:
+            ts = float(timestamps[0])
+            out["batch_time_span"] = 0
+            out["batch_data_density"] = float("inf")
+            out["batch_start_time"] = ts
+            out["batch_end_time"] = ts
+            out["batch_has_timespan"] = False
+            return out
+    except Exception as e:
+        logger.debug("时间跨度分析失败: %s", e)
+
+    out["batch_time_span"] = None
+    out["batch_data_density"] = None
+    out["batch_has_timespan"] = False
+    return out
+
+
+def create_error_result(
+    topic: str,
+    payload: bytes,
+    qos: int,
+    error_msg: str,
+    now: Optional[float] = None,
+) -> dict:
+    """创建错误结果 - 确保包含所有必要字段"""
+    # 尝试从主题提取设备信息
+    topic_type, clean_topic, _, device_info = TopicRouter.match_topic(topic)
+
+    # 🔥 确保始终有 device_id
+    if topic_type == "device_telemetry":
+        device_id = device_info["device_id"]
+        device_type = device_info.get("device_type", "UNKNOWN")
+        vendor = device_info.get("vendor", "UNKNOWN")
+    else:
+        # 从主题中提取尽可能多的信息
+        parts = clean_topic.split("/")
+        if len(parts) >= 4:
+            device_id = parts[3]  # factory/telemetry/type/id
+            device_type = parts[2]
+            vendor = device_id.split("_")[0] if "_" in device_id else "UNKNOWN"
+        else:
+            device_id = "ERROR_UNKNOWN"
+            device_type = "ERROR"
+            vendor = "UNKNOWN"
+
+    return {
+        "device_id": device_id,  # ✅ 始终存在
+        "device_type": device_type,
+        "vendor": vendor,
+        "topic": topic,
+        "timestamp": now if now is not None else time.time(),
+        "qos": qos,
+        "parse_success": False,
+        "parse_error": error_msg,
+        "data_size": len(payload),
+        # memoryview 切片不复制载荷
+        "raw_payload_preview": memoryview(payload)[:PAYLOAD_PREVIEW_BYTES].hex(),
+    }
@@ -167,8 +167,12 @@ class ThreadPool(QObject):
             # 通知开始
             # self.task_started.emit(task_id, task_type.value)
 
+            # 每个任务都会经过此处，使用惰性格式化：未开启 DEBUG 时不拼接字符串
             logging.debug(
-                f"任务提交: {task_id} ({task_type.value}, 优先级: {priority.value})"
+                "任务提交: %s (%s, 优先级: %s)",
+                task_id,
+                task_type.value,
+                priority.value,
             )
             return task_id
 
@@ -190,8 +194,12 @@ class ThreadPool(QObject):
             # 执行用户函数
             result = task.func(*task.args, **task.kwargs)
             execution_time = time.time() - start_time
-            if task.task_type == TaskType.MQTT_PROCESSING:
-                logging.debug(f"线程池解析完成(device_id:{result.get("device_id")})")
+            # MQTT 任务的返回值可能是批量结果列表或 None，日志只记录任务ID
+            if (
+                task.task_type == TaskType.MQTT_PROCESSING
+                and logging.root.isEnabledFor(logging.DEBUG)
+            ):
+                logging.debug("线程池解析完成: %s", task.task_id)
             self._update_success_stats(task, execution_time)
             # 不使用Qtimer执行回调，直接使用信号槽机制
             # 安全执行回调（在主线程）
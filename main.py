@@ -1,7 +1,5 @@
 # main.py
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
 import logging
 
 
@@ -52,6 +50,11 @@ def setup_logging():
 
 
 def main():
+    # 界面依赖在此导入：解析进程池以 spawn 启动，子进程会重新导入本模块，
+    # 模块顶层只保留轻量导入，子进程不加载 Qt 与界面
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
     setup_logging()
     app = QApplication(sys.argv)
     # app.setStyle("Basic")
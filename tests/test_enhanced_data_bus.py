@@ -0,0 +1,134 @@
+"""EnhancedDataBus Redis写入队列测试：publish 入队 → _drain_redis_queue 触发 → buffer_messages 写入"""
+
+import os
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("PySide6")
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+import core.enhanced_data_bus as enhanced
+from core.data_bus import DataChannel
+from core.redis_manager import RedisDataBuffer
+
+
+class _FakePipeline:
+    def __init__(self, store: dict):
+        self._store = store
+        self._results = []
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self._store.setdefault(key, []).append(fields)
+        self._results.append(b"0-1")
+
+    def execute(self):
+        results, self._results = self._results, []
+        return results
+
+
+class _FakeClient:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self.store)
+
+
+class _FakeManager:
+    def __init__(self, client):
+        self._client = client
+
+    def connect(self):
+        return True
+
+    def is_connected(self):
+        return True
+
+    def get_client(self):
+        return self._client
+
+
+class _InlineThreadPool:
+    """同步执行提交的任务，记录提交次数"""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, task_type, func, *args, task_id=None, **kwargs):
+        self.submitted += 1
+        func(*args)
+        return task_id
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    QApplication.instance() or QApplication([])
+
+    client = _FakeClient()
+    manager = _FakeManager(client)
+    pool = _InlineThreadPool()
+    monkeypatch.setattr(enhanced, "redis_manager", manager)
+    monkeypatch.setattr(enhanced, "redis_buffer", RedisDataBuffer(manager))
+    monkeypatch.setattr(enhanced, "get_thread_pool", lambda: pool)
+
+    data_bus = enhanced.EnhancedDataBus()
+    # 由测试直接驱动排空检查
+    data_bus.drain_timer.stop()
+    data_bus.health_timer.stop()
+    yield data_bus, pool, client.store
+
+
+def _publish(data_bus, seq):
+    assert data_bus.publish(DataChannel.TELEMETRY_DATA, "test", {"seq": seq}, "DEV_1")
+
+
+def test_drains_after_latency(bus):
+    data_bus, pool, store = bus
+    _publish(data_bus, 1)
+
+    data_bus._drain_redis_queue()
+    assert pool.submitted == 0
+
+    data_bus._first_enqueue_ts -= data_bus.REDIS_FLUSH_LATENCY
+    data_bus._drain_redis_queue()
+
+    assert pool.submitted == 1
+    assert len(store["telemetry_stream"]) == 1
+    assert not data_bus._redis_queue
+    assert not data_bus._redis_drain_pending
+
+
+def test_drains_immediately_at_flush_size(bus):
+    data_bus, pool, store = bus
+    for seq in range(data_bus.REDIS_FLUSH_SIZE):
+        _publish(data_bus, seq)
+
+    data_bus._drain_redis_queue()
+
+    assert pool.submitted == 1
+    assert len(store["telemetry_stream"]) == data_bus.REDIS_FLUSH_SIZE
+
+
+def test_left_behind_messages_wait_a_full_latency(bus, monkeypatch):
+    data_bus, pool, store = bus
+    buffer = enhanced.redis_buffer
+    buffer_messages = buffer.buffer_messages
+
+    def buffer_and_race(messages):
+        # 模拟排空取走队列后，另一线程仍按"队列非空"路径追加消息（不更新首条入队时间）
+        data_bus._redis_queue.append(messages[0])
+        return buffer_messages(messages)
+
+    monkeypatch.setattr(buffer, "buffer_messages", buffer_and_race)
+    _publish(data_bus, 1)
+    data_bus._first_enqueue_ts -= data_bus.REDIS_FLUSH_LATENCY
+    data_bus._drain_redis_queue()
+    assert pool.submitted == 1
+    assert len(data_bus._redis_queue) == 1
+
+    data_bus._drain_redis_queue()
+    assert pool.submitted == 1
@@ -0,0 +1,161 @@
+"""RedisDataBuffer 写入格式测试：Stream / List 两种策略的条目均可被 redis-py 编码并还原"""
+
+import json
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("PySide6")
+
+from redis.connection import Encoder
+
+from core.data_bus import DataChannel, DataMessage
+from core.redis_manager import RedisDataBuffer
+
+# 与 redis-py 连接实际使用的编码器一致：不支持的类型（dict / None 等）会抛出 DataError
+_ENCODER = Encoder("utf-8", "strict", False)
+
+
+class _FakePipeline:
+    """记录命令并按 redis-py 的规则编码参数，模拟写入后的存储内容"""
+
+    def __init__(self, store: dict):
+        self._store = store
+        self._results = []
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        encoded = {_ENCODER.encode(k): _ENCODER.encode(v) for k, v in fields.items()}
+        self._store.setdefault(key, []).append(encoded)
+        self._results.append(b"0-1")
+
+    def lpush(self, key, value):
+        self._store.setdefault(key, []).insert(0, _ENCODER.encode(value))
+        self._results.append(len(self._store[key]))
+
+    def ltrim(self, key, start, end):
+        self._results.append(True)
+
+    def expire(self, key, ttl):
+        self._results.append(True)
+
+    def execute(self):
+        results, self._results = self._results, []
+        return results
+
+
+class _FakeClient:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self.store)
+
+
+class _FakeManager:
+    def __init__(self, client):
+        self._client = client
+
+    def get_client(self):
+        return self._client
+
+
+@pytest.fixture
+def buffer():
+    client = _FakeClient()
+    return RedisDataBuffer(_FakeManager(client)), client.store
+
+
+def _message(channel, data, device_id="DEV_1"):
+    return DataMessage(channel, "test", data, 1700000000.5, device_id)
+
+
+def test_stream_entry_round_trip(buffer):
+    redis_buffer, store = buffer
+    data = {"device_id": "DEV_1", "sample_record": {"pressure": 1.5}}
+
+    assert (
+        redis_buffer.buffer_messages([_message(DataChannel.TELEMETRY_DATA, data)]) == 1
+    )
+
+    (entry,) = store["telemetry_stream"]
+    assert entry[b"channel"] == b"telemetry_data"
+    assert entry[b"device_id"] == b"DEV_1"
+    assert json.loads(entry[b"data"]) == data
+
+
+@pytest.mark.parametrize(
+    "channel, key",
+    [
+        (DataChannel.ALERTS, "alerts_queue"),
+        (DataChannel.ERRORS, "errors_queue"),
+        (DataChannel.DEVICE_EVENTS, "device_events_queue"),
+    ],
+)
+def test_list_entry_round_trip(buffer, channel, key):
+    redis_buffer, store = buffer
+    data = {"event_type": "device_online", "device_id": "DEV_1"}
+
+    assert redis_buffer.buffer_messages([_message(channel, data)]) == 1
+
+    (entry,) = store[key]
+    decoded = json.loads(entry)
+    assert decoded["channel"] == channel.value
+    assert decoded["device_id"] == "DEV_1"
+    assert decoded["data"] == data
+
+
+def test_mixed_batch_writes_every_strategy(buffer):
+    redis_buffer, store = buffer
+    messages = [
+        _message(DataChannel.TELEMETRY_DATA, {"seq": 1}),
+        _message(DataChannel.ERRORS, {"error": "解析失败"}),
+        _message(DataChannel.DEVICE_EVENTS, {"event_type": "system_message"}),
+    ]
+
+    assert redis_buffer.buffer_messages(messages) == 3
+    assert redis_buffer.get_write_counters() == (3, 0)
+    assert json.loads(store["errors_queue"][0])["data"] == {"error": "解析失败"}
+
+
+def test_single_and_batched_list_paths(buffer):
+    redis_buffer, store = buffer
+    client = redis_buffer.redis_manager.get_client()
+    strategy = redis_buffer.buffer_strategies[DataChannel.ALERTS]
+
+    assert redis_buffer.buffer_message(
+        _message(DataChannel.ALERTS, {"level": "warning"}), enable_batching=False
+    )
+    assert redis_buffer.buffer_message(
+        _message(DataChannel.ALERTS, {"level": "critical"}), enable_batching=True
+    )
+    assert redis_buffer._flush_batch_messages(client, DataChannel.ALERTS, strategy)
+
+    assert [json.loads(entry)["data"]["level"] for entry in store["alerts_queue"]] == [
+        "critical",
+        "warning",
+    ]
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ("已序列化的文本", "已序列化的文本"),
+        ('{"k": 1}'.encode(), '{"k": 1}'),
+        (b"\xff\x00raw", "\ufffd\x00raw"),
+    ],
+)
+def test_str_and_bytes_payloads_every_strategy(buffer, data, expected):
+    redis_buffer, store = buffer
+    messages = [
+        _message(DataChannel.TELEMETRY_DATA, data),
+        _message(DataChannel.ERRORS, data),
+    ]
+
+    assert redis_buffer.buffer_messages(messages) == 2
+
+    # Stream 字段原样写入（redis 接受 str / bytes）
+    (stream_entry,) = store["telemetry_stream"]
+    assert stream_entry[b"data"] == (data if isinstance(data, bytes) else data.encode())
+    # List 信封内 data 为文本
+    (list_entry,) = store["errors_queue"]
+    assert json.loads(list_entry)["data"] == expected
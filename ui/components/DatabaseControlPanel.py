@@ -289,6 +289,7 @@ class DatabaseControlPanel(QDialog):
 
         # 数据库管理器信号
         self.db_manager.connection_changed.connect(self.on_connection_changed)
+        self.db_manager.connection_tested.connect(self.on_connection_tested)
         self.db_manager.stats_updated.connect(self.on_stats_updated)
 
     def load_current_config(self):
@@ -343,42 +344,49 @@ class DatabaseControlPanel(QDialog):
 
     @Slot()
     def test_connection(self):
-        """测试数据库连接"""
+        """测试数据库连接（线程池执行，结果由 on_connection_tested 处理）"""
         try:
             self.test_button.setEnabled(False)
             self.test_button.setText("测试中...")
 
             config = self.get_current_config()
-            success, message = self.db_manager.test_connection(config)
-
-            if success:
-                self.log_message(f"✅ 连接测试成功: {message}")
-                self.connection_info.setText(message)
-                self.connection_info.setStyleSheet("color: green;")
-            else:
-                self.log_message(f"❌ 连接测试失败: {message}")
-                self.connection_info.setText(message)
-                self.connection_info.setStyleSheet("color: red;")
+            if not self.db_manager.test_connection_async(config):
+                raise RuntimeError("提交连接测试任务失败")
 
         except Exception as e:
             self.log_message(f"连接测试异常: {e}", "error")
-        finally:
             self.test_button.setEnabled(True)
             self.test_button.setText("测试连接")
 
+    @Slot(bool, str)
+    def on_connection_tested(self, success: bool, message: str):
+        """处理连接测试结果"""
+        if success:
+            self.log_message(f"✅ 连接测试成功: {message}")
+            self.connection_info.setText(message)
+            self.connection_info.setStyleSheet("color: green;")
+        else:
+            self.log_message(f"❌ 连接测试失败: {message}")
+            self.connection_info.setText(message)
+            self.connection_info.setStyleSheet("color: red;")
+
+        self.test_button.setEnabled(True)
+        self.test_button.setText("测试连接")
+
     @Slot()
     def connect_database(self):
-        """连接数据库"""
+        """连接数据库（线程池执行，结果由 on_connection_changed 处理）"""
         try:
             config = self.get_current_config()
-            success = self.db_manager.connect(config)
-
-            if success:
-                self.log_message("✅ 数据库连接成功")
+            self.connect_button.setEnabled(False)
+            if self.db_manager.connect_async(config):
+                self.log_message("正在连接数据库...")
             else:
-                self.log_message("❌ 数据库连接失败")
+                self.connect_button.setEnabled(True)
+                self.log_message("❌ 提交数据库连接任务失败")
 
         except Exception as e:
+            self.connect_button.setEnabled(True)
             self.log_message(f"连接数据库异常: {e}", "error")
 
     @Slot()
@@ -442,6 +450,7 @@ class DatabaseControlPanel(QDialog):
     @Slot(bool, str)
     def on_connection_changed(self, connected: bool, message: str):
         """处理连接状态变化"""
+        self.log_message(f"{'✅' if connected else '❌'} {message}")
         if connected:
             self.connection_status.setText("● 已连接")
             self.connection_status.setStyleSheet(
@@ -338,6 +338,10 @@ class NetworkControlPanel(QDialog):
             keepalive=60,
             timeout=30,
             subscribe_topics=subscribe_topics,
+            # 分片选项未在界面上编辑，沿用配置文件中的值
+            shard_device_types=self.current_config.shard_device_types,
+            shared_subscription=self.current_config.shared_subscription,
+            share_group=self.current_config.share_group,
         )
 
     @Slot()
@@ -350,6 +354,13 @@ class NetworkControlPanel(QDialog):
                 self.add_log(f"正在连接: {config.host}:{config.port}")
                 self.connect_btn.setEnabled(False)
 
+                self.mqtt_manager.update_config(
+                    {
+                        "shard_device_types": config.shard_device_types,
+                        "shared_subscription": config.shared_subscription,
+                        "share_group": config.share_group,
+                    }
+                )
                 success = self.mqtt_manager.connect(
                     host=config.host,
                     port=config.port,
@@ -438,19 +438,12 @@ class MainWindow(QMainWindow):
             self.logger.info("开始自动启动服务...")
             self.status_label.setText("正在启动系统服务...")
 
-            # 🔥 1. 启动数据库连接
-            db_success = self.auto_start_database()
+            # 🔥 1. 启动MQTT服务（独立于数据库）
+            self._startup_mqtt_success = self.auto_start_mqtt_service()
 
-            # 🔥 2. 启动数据库持久化服务（依赖数据库连接）
-            persistence_success = False
-            if db_success:
-                persistence_success = self.auto_start_persistence_service()
-
-            # 🔥 3. 启动MQTT服务（独立于数据库）
-            mqtt_success = self.auto_start_mqtt_service()
-
-            # 🔥 4. 更新UI状态
-            self.update_startup_status(db_success, persistence_success, mqtt_success)
+            # 🔥 2. 在线程池中连接数据库，持久化服务与UI状态在连接结果返回后处理
+            if not self.auto_start_database():
+                self.update_startup_status(False, False, self._startup_mqtt_success)
 
             # 🔥 5. 刷新MenuBar状态显示
             # QTimer.singleShot(1000, self.refresh_all_status)
@@ -460,31 +453,57 @@ class MainWindow(QMainWindow):
             self.status_label.setText(f"服务启动失败: {e}")
 
     def auto_start_database(self) -> bool:
-        """自动启动数据库连接"""
+        """自动启动数据库连接（线程池执行，结果由 on_startup_database_connected 处理）"""
         try:
             self.status_label.setText("正在连接数据库...")
 
             if self.db_manager.is_connected():
                 self.logger.info("数据库已连接，跳过启动")
+                self.finish_database_startup(True)
                 return True
 
-            # 尝试连接数据库
-            success = self.db_manager.connect()
-
-            if success:
-                self.logger.info("✅ 数据库自动连接成功")
-                self.status_label.setText("数据库连接成功")
+            # 连接结果只处理一次，收到后即断开该槽
+            self.db_manager.connection_changed.connect(
+                self.on_startup_database_connected
+            )
+            if self.db_manager.connect_async():
                 return True
-            else:
-                self.logger.warning("❌ 数据库自动连接失败")
-                self.status_label.setText("数据库连接失败")
-                return False
+
+            self.db_manager.connection_changed.disconnect(
+                self.on_startup_database_connected
+            )
+            self.logger.warning("❌ 提交数据库连接任务失败")
+            self.status_label.setText("数据库连接失败")
+            return False
 
         except Exception as e:
             self.logger.error(f"数据库自动连接异常: {e}")
             self.status_label.setText(f"数据库连接异常: {e}")
             return False
 
+    @Slot(bool, str)
+    def on_startup_database_connected(self, connected: bool, message: str):
+        """启动时的数据库连接结果（主线程）"""
+        self.db_manager.connection_changed.disconnect(
+            self.on_startup_database_connected
+        )
+        self.finish_database_startup(connected)
+
+    def finish_database_startup(self, db_success: bool):
+        """数据库连接完成后：启动持久化服务（依赖数据库连接）并更新启动状态"""
+        persistence_success = False
+        if db_success:
+            self.logger.info("✅ 数据库自动连接成功")
+            self.status_label.setText("数据库连接成功")
+            persistence_success = self.auto_start_persistence_service()
+        else:
+            self.logger.warning("❌ 数据库自动连接失败")
+            self.status_label.setText("数据库连接失败")
+
+        self.update_startup_status(
+            db_success, persistence_success, self._startup_mqtt_success
+        )
+
     def auto_start_persistence_service(self) -> bool:
         """自动启动数据库持久化服务"""
         try:
@@ -610,7 +629,7 @@ class MainWindow(QMainWindow):
             self.logger.info("关闭主窗口...")
             mqtt_manager = get_mqtt_manager()
             if mqtt_manager:
-                mqtt_manager.disconnect()
+                mqtt_manager.shutdown()
                 self.logger.info("✅ MQTT 客户端已断开")
 
             # 🔥 2. 等待线程池完成当前任务